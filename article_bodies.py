@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+正文压缩存储 - 全文（articles.content，最长 3 万字）可选压缩后存到旁表 article_bodies
+articles 表只留元数据，列表/统计类查询扫表时不再碰正文字节
+
+开启: 环境变量 AI_RSS_COMPRESS_BODIES=1（之后新抓的全文写旁表），
+      老数据用 python article_bodies.py --migrate 搬过去
+读取: 连接上调用 register(conn)，SQL 里用 CONTENT_SQL / CONTENT_CHARS_SQL 并 LEFT JOIN BODY_JOIN，
+      或在 Python 里用 load_content(conn, ids)；两种存法（行内 / 旁表）都能读到
+装了 zstandard 用 zstd，否则用 zlib
+
+用法:
+    python article_bodies.py            # 统计
+    python article_bodies.py --migrate  # 把行内全文搬到旁表（--vacuum 顺带回收空间）
+"""
+
+import argparse
+import os
+import sqlite3
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DB_PATH = os.path.join(os.path.dirname(__file__), 'data', 'ai_rss.db')
+
+COMPRESS_BODIES = os.getenv('AI_RSS_COMPRESS_BODIES', '').strip().lower() in ('1', 'true', 'yes', 'on')
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 9
+MIGRATE_BATCH = 500
+
+_BODIES_SQL = '''
+    CREATE TABLE IF NOT EXISTS article_bodies (
+        article_id INTEGER PRIMARY KEY,
+        codec TEXT,
+        body BLOB,
+        chars INTEGER
+    )
+'''
+
+
+# 供 SQL 拼接：正文（行内优先，其次旁表解压）与正文长度（不解压）
+# table 为 articles 表在查询里的名字/别名，自连接时旁表别名为 <table>_body
+def _body_alias(table):
+    return 'article_bodies' if table == 'articles' else f'{table}_body'
+
+
+def body_join(table='articles'):
+    alias = _body_alias(table)
+    return f'LEFT JOIN article_bodies {alias} ON {alias}.article_id = {table}.id'
+
+
+def content_sql(table='articles'):
+    alias = _body_alias(table)
+    return f'COALESCE({table}.content, body_text({alias}.codec, {alias}.body))'
+
+
+def content_chars_sql(table='articles'):
+    alias = _body_alias(table)
+    return f'COALESCE(length({table}.content), {alias}.chars, 0)'
+
+
+BODY_JOIN = body_join()
+CONTENT_SQL = content_sql()
+CONTENT_CHARS_SQL = content_chars_sql()
+
+
+def compress_text(text):
+    """返回 (codec, blob)"""
+    data = text.encode('utf-8')
+    if zstandard is not None:
+        return 'zstd', zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return 'zlib', zlib.compress(data, ZLIB_LEVEL)
+
+
+def decompress_text(codec, blob):
+    if blob is None:
+        return None
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("正文用 zstd 压缩，但没有安装 zstandard")
+        return zstandard.ZstdDecompressor().decompress(blob).decode('utf-8')
+    return zlib.decompress(blob).decode('utf-8')
+
+
+def register(conn):
+    """确保旁表存在，并注册 SQL 函数 body_text(codec, body)"""
+    conn.execute(_BODIES_SQL)
+    conn.create_function('body_text', 2, decompress_text, deterministic=True)
+    return conn
+
+
+def save_content(conn, article_id, text, compress=None):
+    """
+    写入一篇文章的全文（不提交）
+    compress=None 时按 AI_RSS_COMPRESS_BODIES；压缩存旁表时把行内 content 置空，反之删掉旁表行
+    """
+    register(conn)
+    if compress is None:
+        compress = COMPRESS_BODIES
+    if compress and text:
+        codec, blob = compress_text(text)
+        conn.execute(
+            'INSERT OR REPLACE INTO article_bodies (article_id, codec, body, chars) VALUES (?, ?, ?, ?)',
+            (article_id, codec, blob, len(text))
+        )
+        conn.execute('UPDATE articles SET content = NULL WHERE id = ?', (article_id,))
+    else:
+        conn.execute('UPDATE articles SET content = ? WHERE id = ?', (text, article_id))
+        conn.execute('DELETE FROM article_bodies WHERE article_id = ?', (article_id,))
+
+
+def load_content(conn, ids):
+    """批量读取全文: {article_id: text}，没有全文的不出现在结果里"""
+    register(conn)
+    ids = list(ids)
+    result = {}
+    for i in range(0, len(ids), MIGRATE_BATCH):
+        chunk = ids[i:i + MIGRATE_BATCH]
+        placeholders = ','.join('?' * len(chunk))
+        rows = conn.execute(f'''
+            SELECT articles.id, articles.content, article_bodies.codec, article_bodies.body
+            FROM articles {BODY_JOIN}
+            WHERE articles.id IN ({placeholders})
+        ''', chunk).fetchall()
+        for article_id, inline, codec, blob in rows:
+            text = inline if inline is not None else decompress_text(codec, blob)
+            if text:
+                result[article_id] = text
+    return result
+
+
+def migrate(conn, batch=MIGRATE_BATCH):
+    """把行内全文压缩搬到旁表，返回搬动的篇数"""
+    register(conn)
+    moved = 0
+    while True:
+        rows = conn.execute(
+            'SELECT id, content FROM articles WHERE content IS NOT NULL LIMIT ?', (batch,)
+        ).fetchall()
+        if not rows:
+            break
+        with conn:
+            for article_id, text in rows:
+                save_content(conn, article_id, text, compress=True)
+        moved += len(rows)
+        print(f"  ├─ 已搬 {moved} 篇")
+    return moved
+
+
+def stats(conn):
+    register(conn)
+    inline_n, inline_chars = conn.execute(
+        'SELECT COUNT(*), COALESCE(SUM(length(content)), 0) FROM articles WHERE content IS NOT NULL'
+    ).fetchone()
+    side_n, side_chars, side_bytes = conn.execute(
+        'SELECT COUNT(*), COALESCE(SUM(chars), 0), COALESCE(SUM(length(body)), 0) FROM article_bodies'
+    ).fetchone()
+    return {
+        'inline': inline_n, 'inline_chars': inline_chars,
+        'compressed': side_n, 'compressed_chars': side_chars, 'compressed_bytes': side_bytes,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="正文压缩存储")
+    parser.add_argument("--migrate", action="store_true", help="把行内全文压缩搬到旁表")
+    parser.add_argument("--vacuum", action="store_true", help="搬完后 VACUUM 回收空间")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(DB_PATH)
+    if args.migrate:
+        print(f"📦 搬迁全文到 article_bodies（{'zstd' if zstandard else 'zlib'}）...")
+        print(f"✅ 共搬 {migrate(conn)} 篇")
+        if args.vacuum:
+            conn.execute('VACUUM')
+            print("🧹 VACUUM 完成")
+    s = stats(conn)
+    ratio = s['compressed_chars'] / s['compressed_bytes'] if s['compressed_bytes'] else 0
+    print(f"📊 行内全文: {s['inline']} 篇 / {s['inline_chars']} 字；"
+          f"旁表: {s['compressed']} 篇 / {s['compressed_chars']} 字 → {s['compressed_bytes'] / 1e6:.1f}MB"
+          f"（{ratio:.1f} 字/字节）")
+    conn.close()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+超大源流式读取基准：整篇下载+解析 vs feed_stream 流式截断
+
+用法:
+    python benchmarks/bench_feed_stream.py [--sizes-mb 1 5 10] [--max-entries 30]
+
+在合成的大 RSS 文档上比较耗时与峰值内存（tracemalloc），
+并校验两种方式得到的前 max_entries 条条目标识一致。
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import feedparser
+
+import feed_stream
+from http_client import CHUNK_SIZE
+
+
+class _FakeResponse:
+    """按块吐出字节，模拟流式响应"""
+
+    def __init__(self, body):
+        self.body = body
+
+    def iter_content(self, chunk_size=CHUNK_SIZE):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+
+def _make_feed(size_bytes):
+    item = (
+        '<item><title>大模型推理成本下降 {i}</title>'
+        '<link>https://example.com/posts/{i}</link>'
+        '<guid>https://example.com/posts/{i}</guid>'
+        '<description><![CDATA[<p>' + '算力×算法×数据，组织与商业的重塑。' * 20 + '</p>]]></description>'
+        '<pubDate>Sun, 22 Feb 2026 20:37:45 GMT</pubDate></item>\n'
+    )
+    parts = [b'<?xml version="1.0" encoding="utf-8"?>\n<rss version="2.0"><channel><title>Bench</title>\n']
+    size = len(parts[0])
+    i = 0
+    while size < size_bytes:
+        chunk = item.format(i=i).encode('utf-8')
+        parts.append(chunk)
+        size += len(chunk)
+        i += 1
+    parts.append(b'</channel></rss>\n')
+    return b''.join(parts)
+
+
+def _full(body, max_entries):
+    content = b''.join(_FakeResponse(body).iter_content())
+    return feedparser.parse(content).entries[:max_entries]
+
+
+def _streamed(body, max_entries):
+    content, _ = feed_stream.read_feed(_FakeResponse(body), max_entries=max_entries)
+    return feedparser.parse(content).entries[:max_entries]
+
+
+def _measure(fn, body, max_entries):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    entries = fn(body, max_entries)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, [e.get('id') for e in entries]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="超大源流式读取基准")
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[1, 5, 10])
+    parser.add_argument("--max-entries", type=int, default=30)
+    args = parser.parse_args()
+
+    print(f"{'大小':>8} {'整篇(s)':>9} {'流式(s)':>9} {'整篇峰值':>10} {'流式峰值':>10}  结果一致")
+    print("-" * 62)
+    for mb in args.sizes_mb:
+        body = _make_feed(int(mb * 1024 * 1024))
+        t_full, m_full, ids_full = _measure(_full, body, args.max_entries)
+        t_stream, m_stream, ids_stream = _measure(_streamed, body, args.max_entries)
+        same = ids_full == ids_stream
+        print(f"{mb:>6.1f}MB {t_full:>9.3f} {t_stream:>9.3f} "
+              f"{m_full / 1e6:>8.1f}MB {m_stream / 1e6:>8.1f}MB  {'✅' if same else '❌'}")
+        if not same:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+抓取层离线基准：录制一次真实响应，之后在无网络环境下反复回放测量
+
+用法:
+    # 1) 联网录制（写入临时数据库，不碰 data/ai_rss.db）
+    python benchmarks/bench_fetch.py --record fixtures/feeds
+
+    # 2) 离线回放：比较顺序与并发模式，每个请求模拟 200ms 网络延迟
+    python benchmarks/bench_fetch.py --fixtures fixtures/feeds --latency 0.2 --workers 1 8
+
+输出每种模式的墙钟耗时、源/秒，以及累计的下载、解析、入库耗时。
+每种模式都在全新的临时数据库上跑，结果互不影响。
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dedup
+import feed_scheduler
+import feed_telemetry
+import fetcher
+import http_client
+import http_fixtures
+
+
+def _use_fresh_db():
+    path = os.path.join(tempfile.mkdtemp(prefix='ai_rss_bench_'), 'bench.db')
+    fetcher.DB_PATH = path
+    dedup.DB_PATH = path
+    feed_scheduler.DB_PATH = path
+    feed_telemetry.DB_PATH = path
+    fetcher.init_db()
+    return path
+
+
+def _config_feeds():
+    try:
+        with contextlib.redirect_stdout(open(os.devnull, 'w')):
+            from config import RSS_FEEDS
+    except ImportError:
+        return []
+    return [f for f in RSS_FEEDS if f.get("enabled", True) is not False]
+
+
+def record(fixture_dir, workers):
+    feeds = _config_feeds()
+    if not feeds:
+        print("❌ 找不到 config.py 或没有启用的源")
+        return
+    _use_fresh_db()
+    http_fixtures.install(http_client.get_session(), 'record', fixture_dir)
+    fetcher.fetch_all_feeds(feeds=feeds, workers=workers, delay=0)
+    print(f"📼 已录制 {len(http_fixtures.list_fixture_urls(fixture_dir))} 个响应到 {fixture_dir}")
+
+
+def replay(fixture_dir, latency, jitter, workers_list, delay, verbose):
+    urls = http_fixtures.list_fixture_urls(fixture_dir)
+    if not urls:
+        print(f"❌ {fixture_dir} 里没有录制数据，先用 --record 录一次")
+        return
+    names = {f['url']: f['name'] for f in _config_feeds()}
+    feeds = [{'name': names.get(url, url), 'url': url} for url in urls]
+    http_fixtures.install(http_client.get_session(), 'replay', fixture_dir,
+                          latency=latency, jitter=jitter)
+
+    print(f"📼 回放 {len(feeds)} 个源，模拟延迟 {latency * 1000:.0f}ms (+抖动 ≤{jitter * 1000:.0f}ms)")
+    print(f"{'模式':<8} {'源':>4} {'耗时(s)':>8} {'源/秒':>7} {'下载Σ(s)':>9} {'解析Σ(s)':>9} {'入库Σ(s)':>9} {'新增':>6}")
+    print("-" * 72)
+    for workers in workers_list:
+        _use_fresh_db()
+        stats = {}
+        out = sys.stdout if verbose else open(os.devnull, 'w')
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(out):
+            new = fetcher.fetch_all_feeds(feeds=feeds, workers=workers, delay=delay, stats=stats)
+        wall = time.perf_counter() - t0
+        mode = f"并发×{workers}" if workers > 1 else "顺序"
+        print(f"{mode:<8} {stats.get('feeds', 0):>4} {wall:>8.2f} {len(feeds) / wall:>7.1f} "
+              f"{stats.get('fetch_s', 0):>9.2f} {stats.get('parse_s', 0):>9.2f} "
+              f"{stats.get('db_s', 0):>9.2f} {new:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="抓取层录制/回放基准")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--record", metavar="DIR", help="联网抓取一次并录制到 DIR")
+    group.add_argument("--fixtures", metavar="DIR", help="从 DIR 回放并测量")
+    parser.add_argument("--latency", type=float, default=0.2, help="回放时每个请求的模拟延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="额外随机延迟上限（秒）")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, fetcher.FETCH_WORKERS],
+                        help="要比较的并发数，1 为顺序模式")
+    parser.add_argument("--delay", type=float, default=0.0,
+                        help="顺序模式下源之间的间隔（线上为 1 秒，基准默认 0 只测引擎本身）")
+    parser.add_argument("--verbose", action="store_true", help="显示每个源的抓取日志")
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record, max(args.workers))
+    else:
+        replay(args.fixtures, args.latency, args.jitter, args.workers, args.delay, args.verbose)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+超大页面全文提取基准：整页下载+直接解析 vs 流式截断 + prepare_html 预处理
+
+用法:
+    python benchmarks/bench_fulltext_html.py [--sizes-mb 1 5 20]
+
+合成页面 = 头部内联数据脚本 + 正文 + 无限归档列表（大小由 --sizes-mb 控制），
+比较耗时与峰值内存（tracemalloc），并校验两种方式都提取到了正文。
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fulltext_fetcher
+import http_client
+from http_client import CHUNK_SIZE
+
+MARKER = '推理成本的下降正在改变应用层的竞争格局'
+
+
+class _FakeResponse:
+    """按块吐出字节，模拟流式响应"""
+
+    def __init__(self, body):
+        self.body = body
+        self.headers = {'Content-Type': 'text/html; charset=utf-8'}
+
+    def iter_content(self, chunk_size=CHUNK_SIZE):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+
+def _make_page(size_bytes):
+    blob = 'x' * min(size_bytes // 4, 1024 * 1024)
+    paragraph = f'<p>{MARKER}，' + '算力、算法与数据共同决定了组织与商业的重塑速度。' * 6 + '</p>\n'
+    head = (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Bench</title>'
+        f'<script>window.__DATA__ = "{blob}";</script>'
+        '<style>' + '.a{color:red}' * 2000 + '</style></head><body>'
+        '<article><h1>大模型推理成本下降</h1>' + paragraph * 12 + '</article>\n<ul class="archive">\n'
+    )
+    parts = [head.encode('utf-8')]
+    size = len(parts[0])
+    i = 0
+    while size < size_bytes:
+        item = (f'<li><a href="/archive/{i}">往期文章 {i}</a>'
+                f'<img src="data:image/png;base64,{"A" * 400}"></li>\n').encode('utf-8')
+        parts.append(item)
+        size += len(item)
+        i += 1
+    parts.append(b'</ul></body></html>')
+    return b''.join(parts)
+
+
+def _full(body):
+    """旧路径：读完整个响应体，直接按策略顺序解析"""
+    html = b''.join(_FakeResponse(body).iter_content())
+    for _, extractor in fulltext_fetcher.EXTRACTORS:
+        text = extractor(html) or ''
+        if len(text) > fulltext_fetcher.MIN_TEXT_CHARS:
+            return text
+    return ''
+
+
+def _bounded(body):
+    """新路径：最多读 HTML_MAX_BYTES，prepare_html 后再解析"""
+    html, _ = http_client.read_prefix(_FakeResponse(body), fulltext_fetcher.HTML_MAX_BYTES)
+    return fulltext_fetcher.extract_text(html) or ''
+
+
+def _measure(fn, body):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    text = fn(body)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="超大页面全文提取基准")
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[1, 5, 20])
+    args = parser.parse_args()
+
+    results = []
+    for mb in args.sizes_mb:
+        body = _make_page(int(mb * 1024 * 1024))
+        t_full, m_full, text_full = _measure(_full, body)
+        t_new, m_new, text_new = _measure(_bounded, body)
+        ok = MARKER in text_full and MARKER in text_new
+        results.append((mb, t_full, t_new, m_full, m_new, ok))
+
+    print(f"\n{'大小':>8} {'整页(s)':>9} {'截断(s)':>9} {'整页峰值':>10} {'截断峰值':>10}  都提取到正文")
+    print("-" * 66)
+    for mb, t_full, t_new, m_full, m_new, ok in results:
+        print(f"{mb:>6.1f}MB {t_full:>9.2f} {t_new:>9.2f} "
+              f"{m_full / 1e6:>8.1f}MB {m_new / 1e6:>8.1f}MB  {'✅' if ok else '❌'}")
+    if not all(r[-1] for r in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
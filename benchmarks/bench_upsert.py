@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+入库微基准：逐条 SELECT + UPDATE/INSERT（旧实现） vs 单事务批量 upsert
+
+用法:
+    python benchmarks/bench_upsert.py [--sizes 1000 10000] [--repeat 5]
+
+每个规模跑两轮：第一轮全部是新文章（纯插入），第二轮同一批链接再写一次（纯刷新 last_seen）。
+每种写法重复 --repeat 次（每次全新数据库），取各轮最快的一次，减少磁盘抖动的影响。
+使用临时数据库，不会碰 data/ai_rss.db。
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+
+
+def _legacy_save(conn, articles_list, feed_name, feed_url, criteria=""):
+    """旧版 fetcher.save_articles_to_db 的逐条写法（对照组）"""
+    c = conn.cursor()
+    saved_count = 0
+    now = datetime.now()
+    for article in articles_list:
+        c.execute('SELECT id FROM articles WHERE article_link = ?', (article.get('link', ''),))
+        existing = c.fetchone()
+        if existing:
+            c.execute('UPDATE articles SET last_seen = ? WHERE id = ?', (now, existing[0]))
+        else:
+            c.execute('''
+                INSERT INTO articles
+                (feed_name, feed_url, article_title, article_link, published_date, raw_content, criteria, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                feed_name, feed_url,
+                article.get('title', '无标题'),
+                article.get('link', ''),
+                article.get('published', now),
+                article.get('summary', '')[:2000],
+                criteria, now,
+            ))
+            saved_count += 1
+    conn.commit()
+    return saved_count
+
+
+def _batched_save(conn, articles_list, feed_name, feed_url, criteria=""):
+    inserted, _ = db.upsert_articles(conn, articles_list, feed_name, feed_url, criteria, summary_limit=2000)
+    return inserted
+
+
+def _make_articles(n):
+    now = datetime.now()
+    return [
+        {
+            'title': f'Benchmark article {i}',
+            'link': f'https://example.com/posts/{i}',
+            'published': now,
+            'summary': 'lorem ipsum dolor sit amet ' * 20,
+        }
+        for i in range(n)
+    ]
+
+
+def _fresh_db(path):
+    if os.path.exists(path):
+        os.remove(path)
+    db.DB_PATH = path
+    with open(os.devnull, 'w') as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            db.init_db()
+        finally:
+            sys.stdout = stdout
+    return sqlite3.connect(path)
+
+
+def _time_it(save, path, articles):
+    conn = _fresh_db(path)
+    t0 = time.perf_counter()
+    inserted = save(conn, articles, 'bench', 'https://example.com/feed')
+    t_insert = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    touched_inserted = save(conn, articles, 'bench', 'https://example.com/feed')
+    t_touch = time.perf_counter() - t0
+    conn.close()
+    assert inserted == len(articles) and touched_inserted == 0
+    return t_insert, t_touch
+
+
+def _best_of(save, path, articles, repeat):
+    runs = [_time_it(save, path, articles) for _ in range(repeat)]
+    return min(r[0] for r in runs), min(r[1] for r in runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="入库微基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5, help="每种写法跑几次取最快")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix='ai_rss_bench_'), 'bench.db')
+    print(f"{'条数':>7} {'模式':<8} {'插入(s)':>9} {'刷新(s)':>9}")
+    print("-" * 38)
+    for n in args.sizes:
+        articles = _make_articles(n)
+        legacy = _best_of(_legacy_save, path, articles, args.repeat)
+        batched = _best_of(_batched_save, path, articles, args.repeat)
+        print(f"{n:>7} {'逐条':<8} {legacy[0]:>9.3f} {legacy[1]:>9.3f}")
+        print(f"{n:>7} {'批量':<8} {batched[0]:>9.3f} {batched[1]:>9.3f}")
+        print(f"{'':>7} {'加速比':<8} {legacy[0] / batched[0]:>8.1f}x {legacy[1] / batched[1]:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
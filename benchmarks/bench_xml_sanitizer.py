@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+XML 控制字符清洗基准：旧版逐字节生成器 vs bytes.translate
+
+用法:
+    python benchmarks/bench_xml_sanitizer.py [--sizes-mb 1 2 5]
+
+在合成的大 RSS 文档上（中英文混排，随机插入非法控制字符）比较两种实现，
+并校验输出逐字节一致。
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from xml_sanitizer import clean_xml_bytes
+
+
+def _legacy_clean_xml_bytes(data: bytes) -> bytes:
+    """旧版 fetcher._clean_xml_bytes（对照组）"""
+    return bytes(
+        b for b in data
+        if b in (9, 10, 13) or b >= 32
+    )
+
+
+def _make_feed(size_bytes, seed=42):
+    rng = random.Random(seed)
+    item = (
+        '<item><title>大模型推理成本下降 {i} — LLM inference cost</title>'
+        '<link>https://example.com/posts/{i}</link>'
+        '<description><![CDATA[<p>算力×算法×数据，组织与商业的重塑。{i}</p>]]></description>'
+        '<pubDate>Sun, 22 Feb 2026 20:37:45 GMT</pubDate></item>\n'
+    )
+    parts = [b'<?xml version="1.0" encoding="utf-8"?>\n<rss version="2.0"><channel>\n']
+    size = len(parts[0])
+    i = 0
+    while size < size_bytes:
+        chunk = bytearray(item.format(i=i).encode('utf-8'))
+        # 每条约 1/3 概率混入一个非法控制字符（包括 \x00 \x08 \x0b \x1f 等）
+        if rng.random() < 0.33:
+            chunk.insert(rng.randrange(len(chunk)), rng.choice([0, 1, 8, 11, 12, 27, 31]))
+        parts.append(bytes(chunk))
+        size += len(chunk)
+        i += 1
+    parts.append(b'</channel></rss>\n')
+    return b''.join(parts)
+
+
+def _best_of(fn, data, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(data)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="XML 清洗基准")
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[1, 2, 5])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # 全部 256 个字节值逐一校验
+    every_byte = bytes(range(256)) * 4
+    assert clean_xml_bytes(every_byte) == _legacy_clean_xml_bytes(every_byte)
+
+    print(f"{'大小':>8} {'旧版(s)':>9} {'translate(s)':>13} {'加速比':>8}  输出一致")
+    print("-" * 52)
+    for mb in args.sizes_mb:
+        data = _make_feed(int(mb * 1024 * 1024))
+        t_old, out_old = _best_of(_legacy_clean_xml_bytes, data, args.repeat)
+        t_new, out_new = _best_of(clean_xml_bytes, data, args.repeat)
+        same = out_old == out_new
+        print(f"{mb:>6.1f}MB {t_old:>9.3f} {t_new:>13.5f} {t_old / t_new:>7.0f}x  {'✅' if same else '❌'}")
+        if not same:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,16 @@
 #!/usr/bin/env python3
 # check_all_feeds.py - RSS源健康诊断工具
+# 默认直接读取抓取器积累的健康遥测（feed_telemetry）出报告，不再逐个重新抓取；
+# 加 --live 才实时逐个请求所有源
+import argparse
 import sys
 import time
 import requests
 import feedparser
+
+import feed_telemetry
+import http_client
+from xml_sanitizer import clean_xml_bytes
 from datetime import datetime
 
 # 导入你的配置
@@ -15,8 +22,9 @@ except ImportError:
 
 # ============ 配置 ============
 TIMEOUT = 15          # 每个源超时时间（秒）
-DELAY = 1.5           # 源之间延迟，避免被ban
-USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+DELAY = 1.5           # 源之间延迟，避免被ban（仅 --live）
+FAIL_STREAK = 3       # 连续失败达到这个次数判为失败
+STALE_DAYS = 7        # 超过这么多天没有成功抓取判为警告
 
 # 颜色输出（终端友好）
 GREEN = '\033[92m'
@@ -45,8 +53,7 @@ def test_feed(url, name):
     # 1. 基础网络连通性测试
     try:
         start = time.time()
-        headers = {'User-Agent': USER_AGENT}
-        resp = requests.get(url, headers=headers, timeout=TIMEOUT, allow_redirects=True)
+        resp = http_client.get(url, timeout=TIMEOUT, allow_redirects=True)
         result["response_time"] = round(time.time() - start, 2)
         result["status_code"] = resp.status_code
         
@@ -74,6 +81,11 @@ def test_feed(url, name):
     # 2. RSS解析测试
     try:
         feed = feedparser.parse(resp.content)
+        if feed.bozo:
+            # 与抓取器一致：先清洗非法控制字符再判断是否真的有问题
+            cleaned = clean_xml_bytes(resp.content)
+            if len(cleaned) != len(resp.content):
+                feed = feedparser.parse(cleaned)
         
         # 检查是否是有效的RSS/Atom
         if hasattr(feed, 'version') and feed.version:
@@ -108,10 +120,65 @@ def test_feed(url, name):
     
     return result
 
-def main():
+def _parse_time(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def health_result(url, name, row, now=None):
+    """把 feed_health 的一行聚合转换成与 test_feed 相同结构的诊断结果"""
+    now = now or datetime.now()
+    result = {
+        "name": name,
+        "url": url,
+        "status": "no_data",
+        "status_code": None,
+        "articles": 0,
+        "error": "还没有抓取记录（先运行 fetcher.py）",
+        "response_time": None,
+        "feed_type": None,
+        "latest_title": None,
+    }
+    if row is None:
+        return result
+
+    last_success = _parse_time(row['last_success_at'])
+    streak = row['failure_streak'] or 0
+    result.update({
+        "status_code": row['last_status_code'],
+        "articles": round(row['avg_entries'] or 0),
+        "error": row['last_error'],
+        "p50_ms": row['p50_ms'],
+        "p95_ms": row['p95_ms'],
+        "failure_streak": streak,
+        "window": f"{row['window_failures'] or 0}/{row['window_attempts'] or 0}",
+        "last_fetched_at": row['last_fetched_at'],
+        "last_success_at": row['last_success_at'],
+    })
+    if streak >= FAIL_STREAK:
+        result["status"] = "failing"
+        result["error"] = f"连续失败 {streak} 次: {row['last_error'] or '未知错误'}"
+    elif streak > 0:
+        result["status"] = "warning"
+        result["error"] = f"最近失败 {streak} 次: {row['last_error'] or '未知错误'}"
+    elif last_success is None or (now - last_success).days >= STALE_DAYS:
+        result["status"] = "warning"
+        result["error"] = f"超过 {STALE_DAYS} 天没有成功抓取"
+    else:
+        result["status"] = "ok"
+        result["error"] = None
+    return result
+
+
+def main(live=False):
     print("\n" + "=" * 80)
     print_color("🔍 RSS源健康诊断工具", BLUE)
     print_color(f"⏱️  开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", BLUE)
+    print_color(f"📈 数据来源: {'实时逐个抓取' if live else '抓取遥测（feed_health）'}", BLUE)
     print("=" * 80)
     
     all_feeds = config.RSS_FEEDS
@@ -119,10 +186,12 @@ def main():
     skipped = len(all_feeds) - len(feeds)
     print(f"📡 待测源总数: {len(feeds)} 个（已跳过 {skipped} 个禁用源）\n")
     
+    health = {} if live else feed_telemetry.load_health()
     results = []
     working = []
     failed = []
     warning = []
+    no_data = []
     
     for i, feed in enumerate(feeds, 1):
         name = feed.get('name', '未命名')
@@ -130,7 +199,10 @@ def main():
         
         print(f"[{i:2d}/{len(feeds)}] 📍 {name[:40]:<40} ", end='', flush=True)
         
-        result = test_feed(url, name)
+        if live:
+            result = test_feed(url, name)
+        else:
+            result = health_result(url, name, health.get(name))
         results.append(result)
         
         # 输出状态
@@ -140,6 +212,9 @@ def main():
         elif result["status"] == "warning":
             print_color(f"⚠️  警告", YELLOW)
             warning.append(result)
+        elif result["status"] == "no_data":
+            print_color(f"❔ 无数据", YELLOW)
+            no_data.append(result)
         else:
             print_color(f"❌ 失败", RED)
             failed.append(result)
@@ -150,6 +225,12 @@ def main():
             print(f"     ├─ HTTP状态: {result['status_code']}")
         if result["response_time"]:
             print(f"     ├─ 响应时间: {result['response_time']}秒")
+        if result.get("p50_ms") is not None:
+            print(f"     ├─ 抓取耗时: p50 {result['p50_ms']:.0f}ms / p95 {result['p95_ms']:.0f}ms")
+        if result.get("window"):
+            print(f"     ├─ 最近失败/抓取: {result['window']}")
+        if result.get("last_success_at"):
+            print(f"     ├─ 最近成功: {str(result['last_success_at'])[:19]}")
         if result["feed_type"]:
             print(f"     ├─ Feed类型: {result['feed_type']}")
         if result["articles"] > 0:
@@ -162,7 +243,7 @@ def main():
             print(f"     └─ ✅ 状态正常")
         
         # 源之间延迟
-        if i < len(feeds):
+        if live and i < len(feeds):
             time.sleep(DELAY)
         print()
     
@@ -191,6 +272,11 @@ def main():
             print(f"     ├─ URL: {f['url']}")
             print(f"     └─ 原因: {f['error']}")
     
+    if no_data:
+        print(f"\n❔ 还没有抓取记录: {len(no_data)} 个")
+        for n in no_data:
+            print(f"   • {n['name']}")
+    
     # ============ 生成可用的config片段 ============
     print("\n" + "=" * 80)
     print_color("🛠️  可用源配置生成", BLUE)
@@ -231,12 +317,18 @@ def main():
         print(f"\n2. 有警告的 {len(warning)} 个源建议观察几天")
         print("   如果频繁出现抓取失败，考虑替换")
     
-    print(f"\n3. 建议每季度运行一次这个诊断脚本")
-    print("   命令: python check_all_feeds.py")
+    if no_data:
+        print(f"\n3. 无数据的 {len(no_data)} 个源可用 --live 实时检查一次")
+    
+    print(f"\n4. 报告读的是日常抓取积累的遥测，随时可以运行")
+    print("   命令: python check_all_feeds.py（实时抓取: python check_all_feeds.py --live）")
     
     print("\n" + "=" * 80)
     print_color("🏁 诊断完成", BLUE)
     print("=" * 80 + "\n")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description='RSS源健康诊断')
+    parser.add_argument('--live', action='store_true', help='实时逐个抓取所有源，而不是读取抓取遥测')
+    args = parser.parse_args()
+    main(live=args.live)
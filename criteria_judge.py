@@ -9,29 +9,68 @@ AI RSS - 基于全文/RSS摘要的Criteria审阅器
 import sqlite3
 import json
 import os
+import queue
 import time
+from concurrent.futures import ThreadPoolExecutor
 from openai import OpenAI
 from dotenv import dotenv_values
 
+import article_bodies
+import dedup
+import knowledge_context
+import llm_cache
+import prefilter
+from rate_limit import LLMRateLimiter, estimate_tokens
+from article_bodies import BODY_JOIN, CONTENT_CHARS_SQL, CONTENT_SQL
+
 DB_PATH = os.path.join(os.path.dirname(__file__), 'data', 'ai_rss.db')
-KNOWLEDGE_LOG_PATH = os.path.expanduser('~/Agents/knowledge_log/concepts.json')
 
 
-def _load_knowledge_context():
-    """Load a compact summary of active learning concepts for injection into scoring prompts."""
-    try:
-        with open(KNOWLEDGE_LOG_PATH, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        lines = []
-        for c in data.get('concepts', []):
-            lines.append(f"[{c['domain']}] {c['concept']}: {', '.join(c.get('keywords', []))}")
-        return '\n'.join(lines)
-    except Exception:
-        return ''
+def _learning_section(subject):
+    """学习关联段落（没有学习记录时为空）；subject 为提示词里对文章的称呼
+    按 concepts.json 的修改时间缓存，整次运行只拼一次"""
+    def build(concepts):
+        return f"""
+---
+【我正在学习的技术领域（来自真实项目实践）】
+{knowledge_context.format_concepts(concepts, keywords=True)}
+
+3. 学习关联（可选）：
+   如果{subject}与上述任一领域有实质关联，用半句话点出（例如："与我们用LaunchAgents管理进程的实践相关"）。
+   无关联则输出 null。
+   将关联内容拼接在reason末尾，格式：reason内容 + " — " + 学习关联。
+"""
+    return knowledge_context.fragment(('judge', subject), build)
+
+
 DEFAULT_THRESHOLD = 50
 FULLTEXT_PREFETCH_LIMIT = 120
 FULLTEXT_PREFETCH_DAYS = 90
 
+# 并发评分：线程数与共享限速（每分钟请求数 / token 数），可用环境变量覆盖
+JUDGE_WORKERS = int(os.getenv("JUDGE_WORKERS", "4"))
+JUDGE_RPM = int(os.getenv("JUDGE_RPM", "120"))
+JUDGE_TPM = int(os.getenv("JUDGE_TPM", "300000"))
+JUDGE_COMMIT_BATCH = 20     # 每攒多少条评分结果提交一次
+JUDGE_MAX_TOKENS = 280
+
+# 批量审阅：同一源的短摘要每 JUDGE_BATCH_SIZE 篇合成一次请求，criteria 和学习上下文只发一遍
+# 全文或超过 JUDGE_BATCH_MAX_CHARS 的内容仍逐篇审阅；JUDGE_BATCH_SIZE=1 关闭批量
+JUDGE_BATCH_SIZE = int(os.getenv("JUDGE_BATCH_SIZE", "8"))
+JUDGE_BATCH_MAX_CHARS = 1500
+JUDGE_BATCH_ITEM_TOKENS = 160   # 每篇的输出预算（一行 id/score/reason）
+
+JUDGE_SYSTEM_PROMPT = "你是严谨的科技文章审稿人，严格按照给定的筛选标准打分，不偏袒不手软。即使只有摘要也要尽力判断。"
+
+SCORE_SCALE = """   - 90-100：完全命中，有深度分析，直接相关
+   - 70-89：强相关，有实质性内容，符合标准
+   - 50-69：部分相关，擦边或信息不足
+   - 30-49：弱相关，仅提到关键词但无实质
+   - 20-29：完全不相关，或属于"严格排除"范围
+   - 0-19：垃圾内容、广告、纯PR稿"""
+
+_llm_limiter = LLMRateLimiter(JUDGE_RPM, JUDGE_TPM)
+
 # Read API credentials directly from .env file to bypass stale shell environment variables
 _env = dotenv_values(os.path.join(os.path.dirname(__file__), '.env'))
 client = OpenAI(
@@ -52,6 +91,36 @@ FEED_CRITERIA_MAP = {}
 for feed in RSS_FEEDS:
     FEED_CRITERIA_MAP[feed['name']] = feed.get('criteria', '')
 
+def _judge_params(prompt, max_tokens):
+    return dict(
+        model="deepseek-chat",
+        messages=[
+            {"role": "system", "content": JUDGE_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.1,
+        max_tokens=max_tokens,
+        response_format={"type": "json_object"}
+    )
+
+
+def _call_judge(params, prompt):
+    """
+    调用评分模型，返回 (输出文本, 是否命中缓存, total_tokens)
+    同样的提示词（重置评分后重跑等）直接用缓存，不占限速额度；调用方校验输出后再 llm_cache.put
+    """
+    raw = llm_cache.get(params)
+    if raw is not None:
+        return raw, True, None
+    estimated = estimate_tokens(prompt) + params['max_tokens']
+    _llm_limiter.acquire(estimated)
+    response = client.chat.completions.create(**params)
+    usage = getattr(response, 'usage', None)
+    total_tokens = getattr(usage, 'total_tokens', None)
+    _llm_limiter.settle(estimated, total_tokens)
+    return response.choices[0].message.content, False, total_tokens
+
+
 def judge_article(article_id, feed_name, title, content, is_fulltext=False, borrowed_from=None):
     """
     用该源专属的criteria审阅单篇文章
@@ -64,97 +133,162 @@ def judge_article(article_id, feed_name, title, content, is_fulltext=False, borr
         return 50, "无明确criteria，默认保留"
 
     # 如果内容过短或缺失，至少用标题参与判断（不忽略）
-    if not content or len(content) < 50:
-        content = f"{title}\n\n{content or ''}".strip()
+    content, content_type = _content_label(title, content, is_fulltext, borrowed_from)
 
     # 根据内容长度决定截取多少
     content_sample = content[:3000] if len(content) > 3000 else content
-    if is_fulltext and len(content) > 500:
-        content_type = "【全文】"
-    elif len(content) >= 50:
-        content_type = "【RSS摘要】"
-    else:
-        content_type = "【标题】"
-    if borrowed_from:
-        content_type += f"(来自: {borrowed_from})"
-
-    knowledge_context = _load_knowledge_context()
-    learning_section = ""
-    if knowledge_context:
-        learning_section = f"""
----
-【我正在学习的技术领域（来自真实项目实践）】
-{knowledge_context}
 
-3. 学习关联（可选）：
-   如果这篇文章与上述任一领域有实质关联，用半句话点出（例如："与我们用LaunchAgents管理进程的实践相关"）。
-   无关联则输出 null。
-   将关联内容拼接在reason末尾，格式：reason内容 + " — " + 学习关联。
-"""
+    learning_section = _learning_section("这篇文章")
 
-    prompt = f"""你是一个严格的科技文章审稿人。请根据以下"筛选标准"，判断这篇文章是否符合要求。
+    # 固定内容（说明、criteria、评分标准、学习领域、输出格式）在前，文章在最后：
+    # 同一个源的请求前缀完全相同，服务端的前缀缓存可以复用
+    prompt = f"""你是一个严格的科技文章审稿人。请根据以下"筛选标准"，判断文末这篇文章是否符合要求。
 
 ---
 【筛选标准】
 {criteria}
 
----
-【文章标题】
-{title}
-
----
-【文章内容】{content_type}
-{content_sample}
-{learning_section}
 ---
 请完成两项任务：
 
 1. 相关性评分（0-100分）：
-   - 90-100：完全命中，有深度分析，直接相关
-   - 70-89：强相关，有实质性内容，符合标准
-   - 50-69：部分相关，擦边或信息不足
-   - 30-49：弱相关，仅提到关键词但无实质
-   - 20-29：完全不相关，或属于"严格排除"范围
-   - 0-19：垃圾内容、广告、纯PR稿
+{SCORE_SCALE}
 
 2. 评分理由（一句话，如有学习关联则附在末尾）：
    说明为什么给这个分数，扣分点或加分点是什么。
    如果内容明显属于"严格排除"范围，请明确指出。
-
+{learning_section}
+---
 输出格式（严格按此JSON）：
 {{"score": 整数, "reason": "一句话理由（含学习关联，若有）"}}
+
+---
+【文章标题】
+{title}
+
+---
+【文章内容】{content_type}
+{content_sample}
 """
 
+    params = _judge_params(prompt, JUDGE_MAX_TOKENS)
     try:
-        response = client.chat.completions.create(
-            model="deepseek-chat",
-            messages=[
-                {"role": "system", "content": "你是严谨的科技文章审稿人，严格按照给定的筛选标准打分，不偏袒不手软。即使只有摘要也要尽力判断。"},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.1,
-            max_tokens=280,
-            response_format={"type": "json_object"}
-        )
+        raw, cached, total_tokens = _call_judge(params, prompt)
         
-        result = json.loads(response.choices[0].message.content)
+        result = json.loads(raw)
         score = int(result.get('score', 50))
         reason = result.get('reason', '无理由')
         
         # 确保分数在0-100之间
         score = max(0, min(100, score))
         
+        # 能解析的结果才缓存，出错的调用下次还会重试
+        if not cached:
+            llm_cache.put(params, raw, total_tokens)
         return score, reason
         
     except Exception as e:
         print(f"  ⚠️ 审阅失败: {e}")
         return 40, f"AI审阅出错: {str(e)[:50]}"
 
-def batch_judge_unread(threshold=DEFAULT_THRESHOLD, limit=200, prefetch=True, only_missing_fulltext=False):
+def _content_label(title, content, is_fulltext, borrowed_from):
+    """送审内容（过短时补上标题）与内容类型标签"""
+    if not content or len(content) < 50:
+        content = f"{title}\n\n{content or ''}".strip()
+    if is_fulltext and len(content) > 500:
+        content_type = "【全文】"
+    elif len(content) >= 50:
+        content_type = "【RSS摘要】"
+    else:
+        content_type = "【标题】"
+    if borrowed_from:
+        content_type += f"(来自: {borrowed_from})"
+    return content, content_type
+
+
+def _parse_batch(raw, count):
+    """解析批量输出，返回 {编号: (score, reason)}；缺项、编号越界或分数不是数字的条目丢弃"""
+    result = json.loads(raw)
+    if isinstance(result, dict):
+        # json_object 模式下模型只能输出对象，数组包在 results 里（也接受别的键名）
+        result = result.get('results', next((v for v in result.values() if isinstance(v, list)), []))
+    parsed = {}
+    for item in result if isinstance(result, list) else []:
+        try:
+            index = int(item['id'])
+            score = max(0, min(100, int(item['score'])))
+        except (KeyError, TypeError, ValueError):
+            continue
+        if 1 <= index <= count and index not in parsed:
+            parsed[index] = (score, item.get('reason') or '无理由')
+    return parsed
+
+
+def judge_batch(feed_name, items):
+    """
+    同一个源的多篇短内容合成一次请求审阅，criteria 与学习上下文只发一遍
+    items: [(article_id, title, content, borrowed_from)]
+    返回 {article_id: (score, reason)}；输出解析失败时为空，缺项的文章不出现在结果里，
+    由调用方逐篇 judge_article 兜底
+    """
+    criteria = FEED_CRITERIA_MAP.get(feed_name, '')
+    if not criteria:
+        return {item[0]: (50, "无明确criteria，默认保留") for item in items}
+
+    blocks = []
+    for index, (_, title, content, borrowed_from) in enumerate(items, 1):
+        content, content_type = _content_label(title, content, False, borrowed_from)
+        blocks.append(f"[{index}] 标题：{title}\n内容{content_type}：\n{content}")
+    articles_section = '\n\n'.join(blocks)
+    learning_section = _learning_section("某篇文章")
+
+    prompt = f"""你是一个严格的科技文章审稿人。请根据以下"筛选标准"，逐篇判断文末列出的文章是否符合要求。
+
+---
+【筛选标准】
+{criteria}
+
+---
+请对每篇文章分别完成两项任务（各篇独立判断，互不参照）：
+
+1. 相关性评分（0-100分）：
+{SCORE_SCALE}
+
+2. 评分理由（一句话，如有学习关联则附在末尾）：
+   说明为什么给这个分数，扣分点或加分点是什么。
+   如果内容明显属于"严格排除"范围，请明确指出。
+{learning_section}
+---
+输出格式（严格按此JSON，results 里每篇一项、不要遗漏，id 为文章编号）：
+{{"results": [{{"id": 编号, "score": 整数, "reason": "一句话理由（含学习关联，若有）"}}]}}
+
+---
+【待审文章】（共 {len(items)} 篇，方括号里是编号）
+{articles_section}
+"""
+
+    params = _judge_params(prompt, JUDGE_BATCH_ITEM_TOKENS * len(items) + 60)
+    try:
+        raw, cached, total_tokens = _call_judge(params, prompt)
+        parsed = _parse_batch(raw, len(items))
+    except Exception as e:
+        print(f"  ⚠️ 批量审阅失败，改为逐篇: {e}")
+        return {}
+    # 只有每篇都解析出来的输出才缓存，缺项的下次整批重试
+    if not cached and len(parsed) == len(items):
+        llm_cache.put(params, raw, total_tokens)
+    return {items[index - 1][0]: result for index, result in parsed.items()}
+
+
+def batch_judge_unread(threshold=DEFAULT_THRESHOLD, limit=200, prefetch=True, only_missing_fulltext=False,
+                       workers=JUDGE_WORKERS, batch_size=JUDGE_BATCH_SIZE):
     """
     批量审阅未评分的文章
     优先使用全文，如果没有全文则使用RSS摘要
     threshold: 低于此分的标记为淘汰
+    workers: 并发调用 LLM 的线程数（共享 JUDGE_RPM / JUDGE_TPM 限速），1 为逐篇串行
+    batch_size: 同一源的短摘要每多少篇合成一次请求（judge_batch），1 为逐篇请求
+    结果经队列回到主线程，由主线程打印日志并每 JUDGE_COMMIT_BATCH 条批量写库
     """
     # 预抓全文：提升评分质量（优先覆盖最近文章）
     if prefetch:
@@ -174,30 +308,35 @@ def batch_judge_unread(threshold=DEFAULT_THRESHOLD, limit=200, prefetch=True, on
 
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
+    article_bodies.register(conn)
+    dedup.init_dedup(conn)
     c = conn.cursor()
     
     # 查找所有未评分的文章，优先使用全文，没有全文就用raw_content；若都缺失则用标题
-    base_query = '''
+    # 全文可能压缩存在 article_bodies 旁表，长度判断用 chars 列，只有选中全文时才解压
+    base_query = f'''
         SELECT 
             id, 
             feed_name, 
             article_title, 
             article_link,
+            dup_group,
+            raw_content,
             CASE 
-                WHEN content IS NOT NULL AND length(content) > 200 THEN content 
+                WHEN {CONTENT_CHARS_SQL} > 200 THEN {CONTENT_SQL} 
                 WHEN raw_content IS NOT NULL AND length(raw_content) > 0 THEN raw_content
                 ELSE article_title
             END as content_to_judge,
             CASE 
-                WHEN content IS NOT NULL AND length(content) > 200 THEN 1 
+                WHEN {CONTENT_CHARS_SQL} > 200 THEN 1 
                 ELSE 0 
             END as has_fulltext
-        FROM articles
+        FROM articles {BODY_JOIN}
         WHERE criteria_score IS NULL
     '''
     if only_missing_fulltext:
-        base_query += '''
-        AND (content IS NULL OR length(content) <= 200)
+        base_query += f'''
+        AND {CONTENT_CHARS_SQL} <= 200
         '''
     base_query += '''
         ORDER BY published_date DESC
@@ -211,80 +350,190 @@ def batch_judge_unread(threshold=DEFAULT_THRESHOLD, limit=200, prefetch=True, on
     else:
         print(f"⚖️ 共 {len(articles)} 篇文章待审阅（含RSS摘要）")
     
-    kept = 0
-    rejected = 0
-    fulltext_count = 0
-    summary_count = 0
+    tally = {'kept': 0, 'rejected': 0, 'fulltext': 0, 'summary': 0, 'reused': 0, 'prefiltered': 0}
+    pending_writes = []
+
+    def _flush():
+        if pending_writes:
+            with conn:
+                conn.executemany('''
+                    UPDATE articles
+                    SET criteria_score = ?, criteria_reason = ?
+                    WHERE id = ?
+                ''', pending_writes)
+            pending_writes.clear()
+
+    def _record(article_id, score, reason):
+        """记一条评分结果（攒够一批再写库），返回是否保留"""
+        pending_writes.append((score, reason, article_id))
+        if len(pending_writes) >= JUDGE_COMMIT_BATCH:
+            _flush()
+        is_kept = score >= threshold
+        tally['kept' if is_kept else 'rejected'] += 1
+        return is_kept
+
+    def _reuse(row, score, reason, source_feed):
+        tally['reused'] += 1
+        _record(row['id'], score, f"{reason}（同组复用: {source_feed}）")
+        print(f"\n🔗 {row['feed_name']} - {row['article_title'][:60]}... 复用同组评分 {score}（{source_feed}）")
     
-    def _borrow_content_by_title(article_id, title):
-        """从同标题的其他来源借用全文/摘要"""
+    def _group_score(article_id, feed_name):
+        """
+        同一重复组里已经评过分、且所属源 criteria 相同的副本
+        每个源按自己的 criteria 打分，criteria 不同的源只借内容、不借分数
+        """
         c.execute('''
-            SELECT feed_name, content, raw_content
-            FROM articles
-            WHERE article_title = ?
-              AND id != ?
-              AND (
-                    (content IS NOT NULL AND length(content) > 200)
-                 OR (raw_content IS NOT NULL AND length(raw_content) > 0)
-              )
-            ORDER BY length(content) DESC
+            SELECT m.feed_name, m.criteria_score, m.criteria_reason
+            FROM articles a JOIN articles m ON m.dup_group = a.dup_group AND m.id != a.id
+            WHERE a.id = ? AND m.criteria_score IS NOT NULL
+            ORDER BY m.criteria_reason LIKE '%（同组复用:%', m.id
+        ''', (article_id,))
+        criteria = FEED_CRITERIA_MAP.get(feed_name, '')
+        for member in c.fetchall():
+            if member['feed_name'] == feed_name or FEED_CRITERIA_MAP.get(member['feed_name'], '') == criteria:
+                return member
+        return None
+
+    def _borrow_content_from_group(article_id, want_fulltext):
+        """从同一重复组的其他副本借用全文（want_fulltext）或摘要"""
+        if want_fulltext:
+            condition = f"{article_bodies.content_chars_sql('m')} > 200"
+        else:
+            condition = "m.raw_content IS NOT NULL AND length(m.raw_content) >= 50"
+        c.execute(f'''
+            SELECT m.feed_name, {article_bodies.content_sql('m')}, m.raw_content
+            FROM articles a
+            JOIN articles m ON m.dup_group = a.dup_group AND m.id != a.id
+            {article_bodies.body_join('m')}
+            WHERE a.id = ? AND {condition}
+            ORDER BY {article_bodies.content_chars_sql('m')} DESC
             LIMIT 1
-        ''', (title, article_id))
+        ''', (article_id,))
         row = c.fetchone()
         if not row:
             return None, None
-        borrowed_feed = row[0]
-        borrowed_content = row[1] if row[1] and len(row[1]) > 200 else row[2]
-        return borrowed_content, borrowed_feed
+        return (row[1] if want_fulltext else row[2]), row[0]
 
+    # 先在主线程备好每篇要送审的内容；同一重复组、同样 criteria 的在本批只送一篇，其余等它的结果复用
+    jobs = []
+    leaders = {}     # (dup_group, criteria) -> 本批送审的那篇 id
+    followers = {}   # 送审文章 id -> 等它结果复用的同组文章
     for row in articles:
         article_id = row['id']
-        feed_name = row['feed_name']
-        title = row['article_title']
         content = row['content_to_judge']
         has_fulltext = row['has_fulltext']
         borrowed_from = None
 
-        # 如果只有标题/超短内容，尝试从其他来源借全文/摘要
-        if not content or len(content) < 50:
-            borrowed, borrowed_from = _borrow_content_by_title(article_id, title)
+        reused = _group_score(article_id, row['feed_name'])
+        if reused:
+            _reuse(row, reused['criteria_score'], reused['criteria_reason'], reused['feed_name'])
+            continue
+        if row['dup_group'] is not None:
+            key = (row['dup_group'], FEED_CRITERIA_MAP.get(row['feed_name'], ''))
+            if key in leaders:
+                followers.setdefault(leaders[key], []).append(row)
+                continue
+            leaders[key] = article_id
+
+        # 同组其他源已抓到全文就直接用；只有标题/超短内容时借摘要
+        if not has_fulltext:
+            borrowed, borrowed_from = _borrow_content_from_group(article_id, want_fulltext=True)
             if borrowed:
-                content = borrowed
-        
-        if has_fulltext:
-            fulltext_count += 1
-        else:
-            summary_count += 1
-        
-        print(f"\n📄 {feed_name} - {title[:60]}...")
-        print(f"  内容类型: {'✅ 全文' if has_fulltext else '📋 RSS摘要'}, 长度: {len(content)} 字")
-        
-        score, reason = judge_article(article_id, feed_name, title, content, is_fulltext=has_fulltext, borrowed_from=borrowed_from)
-        
-        # 存入数据库
-        c.execute('''
-            UPDATE articles
-            SET criteria_score = ?, criteria_reason = ?
-            WHERE id = ?
-        ''', (score, reason, article_id))
-        conn.commit()
-        
-        if score >= threshold:
-            kept += 1
-            status = "✅ 保留"
+                content, has_fulltext = borrowed, 1
+            elif not content or len(content) < 50:
+                borrowed, borrowed_from = _borrow_content_from_group(article_id, want_fulltext=False)
+                if borrowed:
+                    content = borrowed
+        jobs.append((row, content, has_fulltext, borrowed_from))
+
+    # 本地预筛：历史上该源同类文章几乎都被淘汰、预测分远低于阈值的，不再送 LLM
+    screened = prefilter.screen(
+        [(row['feed_name'], row['article_title'], row['raw_content']) for row, _, _, _ in jobs],
+        threshold=threshold,
+    )
+    if screened:
+        print(f"🧮 本地预筛: {len(screened)}/{len(jobs)} 篇预测分远低于阈值，跳过AI审阅")
+        for i, (score, reason) in screened.items():
+            row = jobs[i][0]
+            tally['prefiltered'] += 1
+            _record(row['id'], score, reason)
+            print(f"\n🧮 {row['feed_name']} - {row['article_title'][:60]}... 预筛淘汰 {score}")
+            for follower in followers.pop(row['id'], []):
+                _reuse(follower, score, reason, row['feed_name'])
+        jobs = [job for i, job in enumerate(jobs) if i not in screened]
+    for _, _, has_fulltext, _ in jobs:
+        tally['fulltext' if has_fulltext else 'summary'] += 1
+
+    # 同一源的短摘要按 batch_size 篇一组合成一次请求；全文和长内容逐篇
+    units = []
+    by_feed = {}
+    for job in jobs:
+        row, content, has_fulltext, _ = job
+        if batch_size > 1 and not has_fulltext and len(content or '') <= JUDGE_BATCH_MAX_CHARS:
+            by_feed.setdefault(row['feed_name'], []).append(job)
         else:
-            rejected += 1
-            status = "❌ 淘汰"
-        
-        print(f"  评分: {score} | {reason}")
-        print(f"  结果: {status}")
-        
-        time.sleep(0.5)  # API限流保护
+            units.append([job])
+    batched = 0
+    for feed_jobs in by_feed.values():
+        for i in range(0, len(feed_jobs), batch_size):
+            units.append(feed_jobs[i:i + batch_size])
+            batched += 1
+    if batched:
+        print(f"📦 批量审阅: {sum(map(len, by_feed.values()))} 篇摘要合成 {batched} 次请求（每次最多 {batch_size} 篇）")
+
+    results = queue.Queue()
+
+    def _judge_job(job):
+        row, content, has_fulltext, borrowed_from = job
+        try:
+            score, reason = judge_article(row['id'], row['feed_name'], row['article_title'], content,
+                                          is_fulltext=has_fulltext, borrowed_from=borrowed_from)
+        except Exception as e:
+            score, reason = 40, f"AI审阅出错: {str(e)[:50]}"
+        results.put((job, score, reason))
+
+    def _judge_unit(unit):
+        """一组同源短摘要走 judge_batch，输出坏了或缺项的逐篇兜底"""
+        judged = {}
+        if len(unit) > 1:
+            try:
+                judged = judge_batch(unit[0][0]['feed_name'], [
+                    (row['id'], row['article_title'], content, borrowed_from)
+                    for row, content, _, borrowed_from in unit
+                ])
+            except Exception as e:
+                print(f"  ⚠️ 批量审阅失败，改为逐篇: {e}")
+        for job in unit:
+            if job[0]['id'] in judged:
+                results.put((job, *judged[job[0]['id']]))
+            else:
+                _judge_job(job)
+
+    if jobs:
+        workers = max(1, min(workers or 1, len(units)))
+        if workers > 1:
+            print(f"🚀 并发审阅: {workers} 线程，限速 {JUDGE_RPM} 次/分钟、{JUDGE_TPM} tokens/分钟")
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for unit in units:
+                pool.submit(_judge_unit, unit)
+            for _ in range(len(jobs)):
+                (row, content, has_fulltext, _), score, reason = results.get()
+                print(f"\n📄 {row['feed_name']} - {row['article_title'][:60]}...")
+                print(f"  内容类型: {'✅ 全文' if has_fulltext else '📋 RSS摘要'}, 长度: {len(content)} 字")
+                status = "✅ 保留" if _record(row['id'], score, reason) else "❌ 淘汰"
+                print(f"  评分: {score} | {reason}")
+                print(f"  结果: {status}")
+                for follower in followers.pop(row['id'], []):
+                    _reuse(follower, score, reason, row['feed_name'])
+    _flush()
     
     conn.close()
+    kept, rejected = tally['kept'], tally['rejected']
     print(f"\n🎯 审阅完成:")
-    print(f"  - 全文审阅: {fulltext_count} 篇")
-    print(f"  - 摘要审阅: {summary_count} 篇")
+    print(f"  - 全文审阅: {tally['fulltext']} 篇")
+    print(f"  - 摘要审阅: {tally['summary']} 篇")
+    print(f"  - 同组复用: {tally['reused']} 篇")
+    print(f"  - 本地预筛淘汰: {tally['prefiltered']} 篇")
     print(f"  - 保留: {kept} 篇 (≥{threshold}分)")
     print(f"  - 淘汰: {rejected} 篇 (<{threshold}分)")
     return kept, rejected
@@ -355,9 +604,10 @@ def judge_specific_feed(feed_name, threshold=DEFAULT_THRESHOLD):
     """专门审阅某个源的未评分文章"""
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
+    article_bodies.register(conn)
     c = conn.cursor()
     
-    c.execute('''
+    c.execute(f'''
         SELECT 
             id, 
             feed_name, 
@@ -365,14 +615,14 @@ def judge_specific_feed(feed_name, threshold=DEFAULT_THRESHOLD):
             article_link,
             raw_content as content_to_judge,
             CASE 
-                WHEN content IS NOT NULL AND length(content) > 200 THEN 1 
+                WHEN {CONTENT_CHARS_SQL} > 200 THEN 1 
                 ELSE 0 
             END as has_fulltext
-        FROM articles
+        FROM articles {BODY_JOIN}
         WHERE criteria_score IS NULL
         AND feed_name = ?
         AND (
-            (content IS NOT NULL AND length(content) > 50)
+            {CONTENT_CHARS_SQL} > 50
             OR 
             (raw_content IS NOT NULL AND length(raw_content) > 50)
         )
@@ -443,6 +693,10 @@ if __name__ == '__main__':
             print("  python criteria_judge.py --no-prefetch   # 不预抓全文，仅用摘要/标题")
             print("  python criteria_judge.py --only-missing-fulltext  # 仅评分缺失全文的文章")
             print("  SKIP_FULLTEXT_PREFETCH=1 python criteria_judge.py --threshold 50  # 环境变量跳过全文预抓")
+            print("  LLM_CACHE_BYPASS=1 python criteria_judge.py  # 不用 LLM 缓存，强制重新调用模型（如 --reset 后想要新结果）")
+            print("  JUDGE_WORKERS=8 JUDGE_RPM=300 python criteria_judge.py  # 并发线程数与每分钟请求上限（JUDGE_WORKERS=1 逐篇串行）")
+            print("  JUDGE_BATCH_SIZE=12 python criteria_judge.py  # 同源短摘要每次请求合审的篇数（1 为逐篇请求）")
+            print("  JUDGE_PREFILTER=0 python criteria_judge.py  # 关闭本地预筛（模型用 python prefilter.py --train 训练）")
             print("  python criteria_judge.py --reset      # 重置所有评分")
             print("  python criteria_judge.py --stats      # 查看评分统计")
             print("  python criteria_judge.py --feed '源名称' # 专门审阅某个源")
@@ -7,6 +7,8 @@ import sqlite3
 import os
 from datetime import datetime
 
+import article_bodies
+
 DB_PATH = os.path.join(os.path.dirname(__file__), 'data', 'ai_rss.db')
 
 def init_db():
@@ -27,6 +29,7 @@ def init_db():
             article_link TEXT UNIQUE,
             published_date TIMESTAMP,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             content TEXT,
             raw_content TEXT,
             fulltext_fetched INTEGER DEFAULT 0,
@@ -38,54 +41,142 @@ def init_db():
         )
     ''')
     
+    # 迁移：老库补 last_seen 列（upsert 依赖它）
+    try:
+        c.execute('ALTER TABLE articles ADD COLUMN last_seen TIMESTAMP')
+    except sqlite3.OperationalError:
+        pass  # column already exists
+    
     # 创建索引
     c.execute('CREATE INDEX IF NOT EXISTS idx_article_link ON articles(article_link)')
     c.execute('CREATE INDEX IF NOT EXISTS idx_published_date ON articles(published_date)')
     c.execute('CREATE INDEX IF NOT EXISTS idx_criteria_score ON articles(criteria_score)')
     c.execute('CREATE INDEX IF NOT EXISTS idx_fulltext_fetched ON articles(fulltext_fetched)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_last_seen ON articles(last_seen)')
+    
+    # 压缩正文旁表（AI_RSS_COMPRESS_BODIES=1 时启用）
+    article_bodies.register(conn)
     
     conn.commit()
     conn.close()
     print("✅ 数据库初始化完成")
 
+# 新链接插入，已存在的链接只刷新 last_seen
+_UPSERT_SQL = '''
+    INSERT INTO articles
+    (feed_name, feed_url, article_title, article_link, published_date, raw_content, criteria, last_seen)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(article_link) DO UPDATE SET last_seen = excluded.last_seen
+'''
+_LOOKUP_CHUNK = 500  # 低于 SQLite 默认的变量个数上限
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)  # UPDATE ... RETURNING
+
+def _to_db_time(value):
+    return value.isoformat(' ') if isinstance(value, datetime) else value
+
+def upsert_articles(conn, articles_list, feed_name, feed_url, criteria="", summary_limit=None, now=None):
+    """
+    批量写入文章（单事务 + executemany）
+    返回 (inserted, touched)：新插入的条数、已存在只刷新 last_seen 的条数
+    """
+    # 时间先转成 sqlite3 默认适配器写入的同一种文本，整批只格式化一次 now
+    now = _to_db_time(now or datetime.now())
+    rows = []
+    for article in articles_list:
+        summary = article.get('summary', '') or ''
+        if summary_limit:
+            summary = summary[:summary_limit]
+        rows.append((
+            feed_name,
+            feed_url,
+            article.get('title', '无标题'),
+            article.get('link', ''),
+            _to_db_time(article.get('published', now)),
+            summary,
+            criteria,
+            now,
+        ))
+    if not rows:
+        return 0, 0
+
+    # 同一批里重复的链接只写第一条
+    by_link = {}
+    for row in rows:
+        by_link.setdefault(row[3], row)
+
+    try:
+        with conn:
+            # 先刷新已存在链接的 last_seen（同时得知哪些已存在），再只插入剩下的新链接；
+            # 重抓老源（最常见）时整批只有几条 UPDATE 语句
+            existing = _touch_existing(conn, list(by_link), now)
+            before = conn.total_changes
+            conn.executemany(_UPSERT_SQL, [row for link, row in by_link.items() if link not in existing])
+            inserted = conn.total_changes - before
+    except sqlite3.Error as e:
+        # 整批失败时逐条重试，坏数据只丢那一条
+        print(f"    ⚠️ 批量写入失败，逐条重试: {e}")
+        inserted = touched = 0
+        for row in rows:
+            try:
+                with conn:
+                    exists = conn.execute(
+                        'SELECT 1 FROM articles WHERE article_link = ?', (row[3],)
+                    ).fetchone()
+                    conn.execute(_UPSERT_SQL, row)
+            except sqlite3.Error as row_error:
+                print(f"    ⚠️ 保存失败: {row_error}")
+                continue
+            if exists:
+                touched += 1
+            else:
+                inserted += 1
+        return inserted, touched
+
+    return inserted, len(existing)
+
+def _touch_existing(conn, links, now):
+    """按块刷新已存在链接的 last_seen，返回其中已存在的链接集合（不提交）"""
+    existing = set()
+    for i in range(0, len(links), _LOOKUP_CHUNK):
+        chunk = links[i:i + _LOOKUP_CHUNK]
+        placeholders = ','.join('?' * len(chunk))
+        if _HAS_RETURNING:
+            existing.update(r[0] for r in conn.execute(
+                f'UPDATE articles SET last_seen = ? WHERE article_link IN ({placeholders}) RETURNING article_link',
+                [now, *chunk]
+            ).fetchall())
+        else:
+            found = [r[0] for r in conn.execute(
+                f'SELECT article_link FROM articles WHERE article_link IN ({placeholders})', chunk
+            )]
+            if found:
+                conn.execute(
+                    f'UPDATE articles SET last_seen = ? WHERE article_link IN ({",".join("?" * len(found))})',
+                    [now, *found]
+                )
+            existing.update(found)
+    return existing
+
 def save_articles(articles_list, feed_name, feed_url, criteria=""):
     """保存文章列表到数据库"""
     conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    saved_count = 0
-    for article in articles_list:
-        try:
-            c.execute('''
-                INSERT OR IGNORE INTO articles 
-                (feed_name, feed_url, article_title, article_link, published_date, raw_content, criteria)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                feed_name,
-                feed_url,
-                article.get('title', '无标题'),
-                article.get('link', ''),
-                article.get('published', datetime.now()),
-                article.get('summary', ''),
-                criteria
-            ))
-            if c.rowcount > 0:
-                saved_count += 1
-        except Exception as e:
-            print(f"    ⚠️ 保存失败: {e}")
-    
-    conn.commit()
+    saved_count, _ = upsert_articles(conn, articles_list, feed_name, feed_url, criteria)
     conn.close()
     return saved_count
 
+# 列表类查询只取元数据和摘要，不碰全文
+_LIST_COLUMNS = '''id, feed_name, feed_url, feed_priority, article_title, article_link,
+    published_date, created_at, last_seen, raw_content, fulltext_fetched,
+    criteria, criteria_score, criteria_reason, summary, is_read'''
+
 def get_recent_articles(limit=50, min_score=None):
-    """获取最近的文章"""
+    """获取最近的文章（不含全文，需要时用 article_bodies.load_content 按 id 取）"""
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
     c = conn.cursor()
     
-    query = '''
-        SELECT * FROM articles 
+    query = f'''
+        SELECT {_LIST_COLUMNS} FROM articles 
         WHERE 1=1
     '''
     params = []
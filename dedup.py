@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+入库去重 - 同一篇报道从多个源进来时归到同一个重复组（articles.dup_group）
+全文抓取和 AI 评分按组只做一次，组内其他副本直接复用
+
+判重依据（按顺序）：
+    1. 规范化链接相同（去跟踪参数；短链/转发域名解析一次跳转并缓存在 url_redirects）
+    2. 规范化标题相同（近 GROUP_WINDOW_DAYS 天内）
+    3. 标题+摘要的 MinHash 估计 Jaccard 相似度 ≥ NEAR_DUP_JACCARD（LSH 分桶找候选）
+组号取组内第一篇入库文章的 id
+
+用法:
+    python dedup.py                  # 统计
+    python dedup.py --backfill 30    # 给最近 30 天还没分组的文章补分组
+"""
+
+import argparse
+import hashlib
+import html
+import os
+import re
+import sqlite3
+import struct
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import http_client
+from url_canon import canonical_url
+
+DB_PATH = os.path.join(os.path.dirname(__file__), 'data', 'ai_rss.db')
+
+MINHASH_PERMS = 64           # 签名长度
+MINHASH_BANDS = 16           # LSH 分桶数（每桶 4 个值），Jaccard 0.6 时约 9 成概率成为候选
+NEAR_DUP_JACCARD = 0.6       # 标题+摘要的词集合相似度达到这个值算同一篇
+MINHASH_MIN_TOKENS = 8       # 文本太短时指纹不可靠，只按链接/标题判重
+MIN_TITLE_CHARS = 8          # 规范化后短于这个长度的标题不参与标题判重
+GROUP_WINDOW_DAYS = 7        # 只和最近几天入库的文章比对
+REDIRECT_TIMEOUT = 8
+
+# 只对这些转发/短链域名解析跳转，普通链接不发请求
+REDIRECT_HOSTS = {
+    'feedproxy.google.com', 'feeds.feedburner.com', 'feedburner.google.com',
+    't.co', 'bit.ly', 'buff.ly', 'ow.ly', 'tinyurl.com', 'dlvr.it', 'ift.tt',
+    'lnkd.in', 'trib.al', 'is.gd', 'goo.gl', 'rebrand.ly', 'sc.mp', 'wp.me',
+}
+
+_REDIRECTS_SQL = '''
+    CREATE TABLE IF NOT EXISTS url_redirects (
+        url TEXT PRIMARY KEY,
+        resolved TEXT,
+        resolved_at TIMESTAMP
+    )
+'''
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_WORD_RE = re.compile(r'[a-z0-9]+')
+_CJK_RE = re.compile(r'[㐀-鿿]+')
+_TITLE_STRIP_RE = re.compile(r'[\W_]+')
+
+
+def init_dedup(conn):
+    """补 canonical_link / minhash / dup_group 列和跳转缓存表（幂等）"""
+    for column in ('canonical_link TEXT', 'minhash BLOB', 'dup_group INTEGER'):
+        try:
+            conn.execute(f'ALTER TABLE articles ADD COLUMN {column}')
+        except sqlite3.OperationalError:
+            pass  # column already exists
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_canonical_link ON articles(canonical_link)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_dup_group ON articles(dup_group)')
+    conn.execute(_REDIRECTS_SQL)
+    conn.commit()
+
+
+# ========== 链接：跳转解析 + 规范化 ==========
+
+def needs_redirect(url):
+    host = (urlsplit(url).hostname or '').lower()
+    return host in REDIRECT_HOSTS
+
+
+def _follow(url):
+    """跟随跳转拿到最终地址，失败时返回原地址"""
+    try:
+        response = http_client.get(url, timeout=REDIRECT_TIMEOUT, stream=True)
+        try:
+            return response.url or url
+        finally:
+            response.close()
+    except Exception:
+        return url
+
+
+def _cached_redirects(conn, urls):
+    conn.execute(_REDIRECTS_SQL)
+    cached = {}
+    for url in urls:
+        row = conn.execute('SELECT resolved FROM url_redirects WHERE url = ?', (url,)).fetchone()
+        if row:
+            cached[url] = row[0]
+    return cached
+
+
+def resolve_redirects(links, conn=None):
+    """
+    解析转发/短链域名的跳转（只读缓存 + 网络请求，不写库，适合在写锁之外调用）
+    返回本次新解析的 [(url, resolved)]，交给 save_redirects 写入缓存
+    """
+    pending = {link for link in links if link and needs_redirect(link)}
+    if not pending:
+        return []
+    own = conn is None
+    if own:
+        conn = sqlite3.connect(DB_PATH)
+    try:
+        cached = _cached_redirects(conn, pending)
+    finally:
+        if own:
+            conn.close()
+    return [(url, _follow(url)) for url in pending - cached.keys()]
+
+
+def save_redirects(conn, resolved, now=None):
+    if not resolved:
+        return
+    conn.execute(_REDIRECTS_SQL)
+    now = now or datetime.now()
+    conn.executemany(
+        'INSERT OR REPLACE INTO url_redirects (url, resolved, resolved_at) VALUES (?, ?, ?)',
+        [(url, target, now) for url, target in resolved]
+    )
+
+
+# ========== 文本指纹 ==========
+
+def _tokens(text):
+    """英文按词、中文按相邻两字切分"""
+    text = html.unescape(_TAG_RE.sub(' ', text or '')).lower()
+    tokens = _WORD_RE.findall(text)
+    for run in _CJK_RE.findall(text):
+        tokens.extend(run[i:i + 2] for i in range(max(1, len(run) - 1)))
+    return tokens
+
+
+_PRIME = (1 << 61) - 1
+# 固定种子生成的 (a, b)，保证不同进程算出的签名可比
+_PERMS = [
+    (int.from_bytes(hashlib.blake2b(f"a{i}".encode(), digest_size=8).digest(), 'big') % (_PRIME - 1) + 1,
+     int.from_bytes(hashlib.blake2b(f"b{i}".encode(), digest_size=8).digest(), 'big') % _PRIME)
+    for i in range(MINHASH_PERMS)
+]
+_SIG_FORMAT = f'<{MINHASH_PERMS}Q'
+
+
+def minhash(text):
+    """标题+摘要的 MinHash 签名（元组）；词太少时返回 None"""
+    tokens = set(_tokens(text))
+    if len(tokens) < MINHASH_MIN_TOKENS:
+        return None
+    hashes = [int.from_bytes(hashlib.blake2b(t.encode('utf-8'), digest_size=8).digest(), 'big')
+              for t in tokens]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMS)
+
+
+def pack_signature(sig):
+    return struct.pack(_SIG_FORMAT, *sig) if sig else None
+
+
+def unpack_signature(blob):
+    return struct.unpack(_SIG_FORMAT, blob) if blob and len(blob) == struct.calcsize(_SIG_FORMAT) else None
+
+
+def similarity(a, b):
+    """两个签名估计的 Jaccard 相似度"""
+    return sum(x == y for x, y in zip(a, b)) / MINHASH_PERMS
+
+
+def _band_keys(sig):
+    rows = MINHASH_PERMS // MINHASH_BANDS
+    return [(i, sig[i * rows:(i + 1) * rows]) for i in range(MINHASH_BANDS)]
+
+
+class _NearDupIndex:
+    """LSH 分桶：只和至少有一个桶相同的签名比较"""
+
+    def __init__(self):
+        self._buckets = {}
+
+    def add(self, sig, group):
+        for key in _band_keys(sig):
+            self._buckets.setdefault(key, []).append((sig, group))
+
+    def find(self, sig):
+        best, best_sim = None, NEAR_DUP_JACCARD
+        for key in _band_keys(sig):
+            for other, group in self._buckets.get(key, ()):
+                sim = similarity(sig, other)
+                if sim >= best_sim:
+                    best, best_sim = group, sim
+        return best
+
+
+def normalize_title(title):
+    title = _TITLE_STRIP_RE.sub('', html.unescape(title or '').lower())
+    return title if len(title) >= MIN_TITLE_CHARS and title != '无标题' else None
+
+
+# ========== 分组 ==========
+
+def assign_groups(conn, links=None, window_days=GROUP_WINDOW_DAYS, backfill_days=None):
+    """
+    给还没有 dup_group 的文章分组（不提交）
+    links: 只处理这些链接（入库后调用）；None 时处理最近 backfill_days 天的全部未分组文章
+    返回并入已有组的篇数
+    """
+    init_dedup(conn)
+    if links is not None:
+        links = list(links)
+        if not links:
+            return 0
+        placeholders = ','.join('?' * len(links))
+        todo = conn.execute(f'''
+            SELECT id, article_link, canonical_link, article_title, raw_content
+            FROM articles WHERE dup_group IS NULL AND article_link IN ({placeholders})
+            ORDER BY id
+        ''', links).fetchall()
+    else:
+        todo = conn.execute('''
+            SELECT id, article_link, canonical_link, article_title, raw_content
+            FROM articles WHERE dup_group IS NULL AND created_at >= datetime('now', ?)
+            ORDER BY id
+        ''', (f"-{int(backfill_days or window_days)} days",)).fetchall()
+    if not todo:
+        return 0
+
+    by_link, by_title, near = {}, {}, _NearDupIndex()
+    for gid, link, title, blob in conn.execute('''
+        SELECT dup_group, canonical_link, article_title, minhash FROM articles
+        WHERE dup_group IS NOT NULL AND created_at >= datetime('now', ?)
+    ''', (f"-{int(window_days + (backfill_days or 0))} days",)):
+        if link:
+            by_link.setdefault(link, gid)
+        key = normalize_title(title)
+        if key:
+            by_title.setdefault(key, gid)
+        sig = unpack_signature(blob)
+        if sig:
+            near.add(sig, gid)
+
+    redirects = _cached_redirects(conn, {row[1] for row in todo if row[1] and needs_redirect(row[1])})
+    merged = 0
+    for article_id, link, canon, title, summary in todo:
+        canon = canon or canonical_url(redirects.get(link, link))
+        key = normalize_title(title)
+        sig = minhash(f"{title or ''} {summary or ''}")
+        group = by_link.get(canon) or (by_title.get(key) if key else None)
+        if group is None and sig:
+            group = near.find(sig)
+        if group is None:
+            group = article_id
+        else:
+            merged += 1
+        conn.execute(
+            'UPDATE articles SET canonical_link = ?, minhash = ?, dup_group = ? WHERE id = ?',
+            (canon, pack_signature(sig), group, article_id)
+        )
+        by_link.setdefault(canon, group)
+        if key:
+            by_title.setdefault(key, group)
+        if sig:
+            near.add(sig, group)
+    return merged
+
+
+def group_stats(conn):
+    init_dedup(conn)
+    grouped, groups, dup_groups, copies = conn.execute('''
+        SELECT COALESCE(SUM(n), 0), COUNT(*), COALESCE(SUM(n > 1), 0), COALESCE(SUM(n - 1), 0)
+        FROM (SELECT COUNT(*) AS n FROM articles WHERE dup_group IS NOT NULL GROUP BY dup_group)
+    ''').fetchone()
+    return {'grouped': grouped, 'groups': groups, 'dup_groups': dup_groups, 'copies': copies}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="入库去重分组")
+    parser.add_argument("--backfill", type=int, metavar="DAYS", help="给最近 DAYS 天未分组的文章补分组")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(DB_PATH)
+    if args.backfill:
+        merged = assign_groups(conn, backfill_days=args.backfill)
+        conn.commit()
+        print(f"🔗 补分组完成，{merged} 篇并入已有组")
+    s = group_stats(conn)
+    print(f"📊 已分组 {s['grouped']} 篇 / {s['groups']} 组，其中 {s['dup_groups']} 组有重复，"
+          f"共 {s['copies']} 篇副本（全文和评分按组只做一次）")
+    conn.close()
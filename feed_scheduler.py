@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+按源自适应调度 - 根据每个源观测到的发文间隔决定下次抓取时间
+高频源（arXiv 类）缩短抓取间隔，持续没有新文的源指数退避
+"""
+
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+DB_PATH = os.path.join(os.path.dirname(__file__), 'data', 'ai_rss.db')
+
+# ========== 调度参数（秒）==========
+MIN_INTERVAL = 30 * 60              # 最短抓取间隔
+MAX_INTERVAL = 3 * 24 * 3600        # 最长抓取间隔（退避上限）
+DEFAULT_INTERVAL = 6 * 3600         # 没有历史数据时的发文间隔估计
+POLL_FRACTION = 0.5                 # 每个预期发文间隔内抓两次
+EWMA_ALPHA = 0.3                    # 发文间隔滑动平均的权重
+BACKOFF_FACTOR = 2.0                # 每次空抓后间隔翻倍
+MIN_ARRIVAL_GAP = 60                # 同批发布的文章按至少60秒间隔计，避免均值被压成0
+
+_SCHEDULE_SQL = '''
+    CREATE TABLE IF NOT EXISTS feed_schedule (
+        feed_name TEXT PRIMARY KEY,
+        mean_interval REAL,
+        last_item_at REAL,
+        last_polled_at REAL,
+        next_due_at REAL,
+        empty_streak INTEGER DEFAULT 0,
+        polls INTEGER DEFAULT 0
+    )
+'''
+
+
+def init_schedule_table():
+    """确保调度表存在"""
+    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute(_SCHEDULE_SQL)
+    conn.commit()
+    conn.close()
+
+
+def load_schedule():
+    """读取全部源的调度状态: {feed_name: row_dict}"""
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    try:
+        rows = conn.execute('SELECT * FROM feed_schedule').fetchall()
+    except sqlite3.OperationalError:
+        rows = []
+    finally:
+        conn.close()
+    return {r['feed_name']: dict(r) for r in rows}
+
+
+def next_interval(mean_interval, empty_streak):
+    """由发文间隔估计和连续空抓次数算出下次抓取间隔"""
+    base = (mean_interval or DEFAULT_INTERVAL) * POLL_FRACTION
+    interval = base * (BACKOFF_FACTOR ** min(empty_streak, 10))
+    return max(MIN_INTERVAL, min(MAX_INTERVAL, interval))
+
+
+def due_feeds(feeds, now=None):
+    """
+    把源列表分成 (到期, 未到期) 两组
+    从未抓过的源总是到期
+    """
+    now = now or time.time()
+    schedule = load_schedule()
+    due, waiting = [], []
+    for feed in feeds:
+        row = schedule.get(feed['name'])
+        if row is None or not row['next_due_at'] or row['next_due_at'] <= now:
+            due.append(feed)
+        else:
+            waiting.append(feed)
+    return due, waiting
+
+
+def record_poll(feed_name, outcome, item_times=(), now=None):
+    """
+    记录一次抓取结果并计算下次到期时间
+
+    outcome: 'ok'（解析成功）/ 'unchanged'（304或正文未变）/ 'error'
+    item_times: 本次新文章的发布时间（epoch 秒）
+    返回: 下次到期时间（epoch 秒）
+    """
+    now = now or time.time()
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    c = conn.cursor()
+    c.execute(_SCHEDULE_SQL)
+    row = c.execute(
+        'SELECT * FROM feed_schedule WHERE feed_name = ?', (feed_name,)
+    ).fetchone()
+
+    mean = row['mean_interval'] if row else None
+    last_item = row['last_item_at'] if row else None
+    empty_streak = row['empty_streak'] if row else 0
+    polls = (row['polls'] if row else 0) + 1
+
+    if outcome == 'ok' and item_times:
+        # 按时间顺序累积发文间隔；补发的旧文章（早于上次最新）不参与估计
+        for t in sorted(item_times):
+            if last_item is not None and t > last_item:
+                gap = max(t - last_item, MIN_ARRIVAL_GAP)
+                mean = gap if mean is None else EWMA_ALPHA * gap + (1 - EWMA_ALPHA) * mean
+            if last_item is None or t > last_item:
+                last_item = t
+        empty_streak = 0
+    else:
+        empty_streak += 1
+
+    next_due = now + next_interval(mean, empty_streak)
+    c.execute('''
+        INSERT INTO feed_schedule
+        (feed_name, mean_interval, last_item_at, last_polled_at, next_due_at, empty_streak, polls)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(feed_name) DO UPDATE SET
+            mean_interval = excluded.mean_interval,
+            last_item_at = excluded.last_item_at,
+            last_polled_at = excluded.last_polled_at,
+            next_due_at = excluded.next_due_at,
+            empty_streak = excluded.empty_streak,
+            polls = excluded.polls
+    ''', (feed_name, mean, last_item, now, next_due, empty_streak, polls))
+    conn.commit()
+    conn.close()
+    return next_due
+
+
+def show_schedule():
+    """打印各源的调度状态（按下次到期时间排序）"""
+    schedule = sorted(load_schedule().values(), key=lambda r: r['next_due_at'] or 0)
+    now = time.time()
+    print(f"{'源':<32} {'平均发文间隔':>10} {'空抓':>4} {'下次抓取':>18}")
+    print("-" * 70)
+    for r in schedule:
+        mean_h = f"{r['mean_interval'] / 3600:.1f}h" if r['mean_interval'] else "-"
+        due_at = r['next_due_at'] or 0
+        due = "已到期" if due_at <= now else datetime.fromtimestamp(due_at).strftime('%m-%d %H:%M')
+        print(f"{r['feed_name'][:32]:<32} {mean_h:>10} {r['empty_streak']:>4} {due:>18}")
+
+
+if __name__ == '__main__':
+    show_schedule()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+流式读取 RSS/Atom - 边下载边数条目，够数或碰到已见条目就停
+超大的源（几 MB、上百条）只下载和解析前面真正用得到的那一截，
+截断处补上外层闭合标签后照常交给 feedparser
+"""
+
+import html
+import re
+
+from http_client import CHUNK_SIZE, ResponseTooLarge
+
+FEED_MAX_BYTES = 5 * 1024 * 1024    # 单个源最多读这么多字节（按解压后计）
+SEEN_STOP_RUN = 3                   # 连续遇到这么多条已见条目就停止读取
+
+_ITEM_START = re.compile(rb'<(?:[\w.-]+:)?(?:item|entry)[\s>]', re.I)
+_ITEM_END = re.compile(rb'</(?:[\w.-]+:)?(?:item|entry)\s*>', re.I)
+_TAG = re.compile(
+    rb'<!\[CDATA\[.*?\]\]>|<!--.*?-->|<[?!][^>]*>|<(/?)([\w:.-]+)(?:"[^"]*"|\'[^\']*\'|[^>"\'])*?(/?)>',
+    re.S,
+)
+_GUID = re.compile(rb'<(?:[\w.-]+:)?(guid|id)\b[^>]*>(.*?)</(?:[\w.-]+:)?\1\s*>', re.I | re.S)
+_LINK_TEXT = re.compile(rb'<link\s*>(.*?)</link\s*>', re.I | re.S)
+_LINK_HREF = re.compile(rb'<(?:[\w.-]+:)?link\b([^>]*)>', re.I)
+_ATTR = re.compile(rb'''(rel|href)\s*=\s*["']([^"']*)["']''', re.I)
+_CDATA = re.compile(rb'^\s*<!\[CDATA\[(.*)\]\]>\s*$', re.S)
+_MAX_END_TAG = 64  # 续读时回看的字节数，避免闭合标签被切在两个数据块之间
+
+
+def _text(raw):
+    m = _CDATA.match(raw)
+    if m:
+        raw = m.group(1)
+    return html.unescape(raw.decode('utf-8', 'replace')).strip()
+
+
+def item_keys(raw):
+    """
+    从单个 <item>/<entry> 的原始字节里取 guid/id 和 link
+    与 fetcher._entry_keys 取同样的两个标识，只用于提前停止判断
+    """
+    keys = []
+    m = _GUID.search(raw)
+    if m:
+        keys.append(_text(m.group(2)))
+    m = _LINK_TEXT.search(raw)
+    if m:
+        keys.append(_text(m.group(1)))
+    else:
+        for m in _LINK_HREF.finditer(raw):
+            attrs = {k.lower(): v for k, v in _ATTR.findall(m.group(1))}
+            if b'href' in attrs and attrs.get(b'rel', b'alternate') == b'alternate':
+                keys.append(_text(attrs[b'href']))
+                break
+    return [k for k in keys if k]
+
+
+def closing_tags(header):
+    """条目之前仍未闭合的外层元素（如 rss/channel、feed、rdf:RDF）的闭合标签"""
+    stack = []
+    for m in _TAG.finditer(header):
+        closing, name, self_closing = m.group(1), m.group(2), m.group(3)
+        if name is None or self_closing:
+            continue
+        if closing:
+            while name in stack:
+                if stack.pop() == name:
+                    break
+        else:
+            stack.append(name)
+    return b''.join(b'</' + name + b'>' for name in reversed(stack))
+
+
+def read_feed(response, max_entries=None, seen=None, max_bytes=FEED_MAX_BYTES,
+              seen_run=SEEN_STOP_RUN):
+    """
+    流式读取源的响应体，在条目边界上提前截断
+
+    max_entries: 读满这么多条完整条目后停止（与原先 entries[:max_entries] 的取法一致）
+    seen: 已见条目标识集合；连续 seen_run 条都已见时停止
+    max_bytes: 字节上限，超出时截到最后一个完整条目；一个完整条目都没有则抛 ResponseTooLarge
+
+    返回 (body, info)：body 是可直接交给 feedparser 的字节，
+    info = {'items', 'bytes_read', 'truncated'（截断原因或 None）}
+    调用方负责关闭 response
+    """
+    buf = bytearray()
+    items = 0
+    seen_streak = 0
+    first_item = None
+    cut = None          # 最后一个完整条目结束的位置
+    reason = None
+    scan = 0
+
+    for chunk in response.iter_content(CHUNK_SIZE):
+        buf += chunk
+        while True:
+            m = _ITEM_END.search(buf, scan)
+            if not m:
+                scan = max(scan, len(buf) - _MAX_END_TAG)
+                break
+            end = m.end()
+            segment = bytes(buf[cut or 0:end])
+            starts = list(_ITEM_START.finditer(segment))
+            if starts:
+                if first_item is None:
+                    first_item = (cut or 0) + starts[0].start()
+                raw = segment[starts[-1].start():]
+            else:
+                raw = segment
+            items += 1
+            cut = scan = end
+
+            if seen:
+                keys = item_keys(raw)
+                seen_streak = seen_streak + 1 if keys and any(k in seen for k in keys) else 0
+                if seen_streak >= seen_run:
+                    reason = 'seen'
+                    break
+            if max_entries and items >= max_entries:
+                reason = 'max_entries'
+                break
+        if reason:
+            break
+        if max_bytes and len(buf) > max_bytes:
+            if cut is None:
+                raise ResponseTooLarge(f"body exceeds {max_bytes} bytes before the first complete item")
+            reason = 'max_bytes'
+            break
+
+    info = {'items': items, 'bytes_read': len(buf), 'truncated': reason}
+    if reason is None:
+        return bytes(buf), info
+    header = bytes(buf[:first_item]) if first_item is not None else b''
+    return bytes(buf[:cut]) + closing_tags(header), info
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+源健康遥测 - 抓取器每抓一次源写一行记录，并维护每个源的滚动聚合
+（p50/p95 延迟、连续失败次数等），check_all_feeds.py 直接读这里出报告
+"""
+
+import math
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(os.path.dirname(__file__), 'data', 'ai_rss.db')
+
+ROLLING_WINDOW = 50         # 滚动聚合看最近多少次抓取
+LOG_RETENTION_DAYS = 90     # 明细保留天数
+
+_TELEMETRY_SQL = [
+    '''
+    CREATE TABLE IF NOT EXISTS feed_fetch_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        feed_name TEXT,
+        feed_url TEXT,
+        fetched_at TIMESTAMP,
+        outcome TEXT,
+        status_code INTEGER,
+        bytes INTEGER,
+        attempts INTEGER,
+        ttfb_ms REAL,
+        total_ms REAL,
+        parse_ms REAL,
+        entries_seen INTEGER,
+        new_items INTEGER,
+        error TEXT
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_fetch_log_feed ON feed_fetch_log(feed_name, id)',
+    '''
+    CREATE TABLE IF NOT EXISTS feed_health (
+        feed_name TEXT PRIMARY KEY,
+        feed_url TEXT,
+        last_fetched_at TIMESTAMP,
+        last_outcome TEXT,
+        last_status_code INTEGER,
+        last_error TEXT,
+        last_success_at TIMESTAMP,
+        failure_streak INTEGER DEFAULT 0,
+        window_attempts INTEGER,
+        window_failures INTEGER,
+        p50_ms REAL,
+        p95_ms REAL,
+        avg_entries REAL,
+        total_new_items INTEGER DEFAULT 0
+    )
+    ''',
+]
+
+
+def init_telemetry_tables():
+    """确保遥测表存在"""
+    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+    conn = sqlite3.connect(DB_PATH)
+    for sql in _TELEMETRY_SQL:
+        conn.execute(sql)
+    conn.commit()
+    conn.close()
+
+
+def _percentile(sorted_values, pct):
+    """最近秩法百分位；空列表返回 None"""
+    if not sorted_values:
+        return None
+    idx = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[idx]
+
+
+def record_fetch(feed_name, feed_url, report):
+    """
+    写一行抓取记录并刷新该源的滚动聚合
+
+    report: fetcher.fetch_articles_from_feed 填好的结果 dict
+    """
+    now = datetime.now()
+    failed = report.get('outcome') == 'error'
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    with conn:
+        for sql in _TELEMETRY_SQL:
+            conn.execute(sql)
+        conn.execute('''
+            INSERT INTO feed_fetch_log
+            (feed_name, feed_url, fetched_at, outcome, status_code, bytes, attempts,
+             ttfb_ms, total_ms, parse_ms, entries_seen, new_items, error)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            feed_name, feed_url, now, report.get('outcome'),
+            report.get('status_code'), report.get('bytes'), report.get('attempts'),
+            report['ttfb_s'] * 1000 if report.get('ttfb_s') is not None else None,
+            report.get('fetch_s', 0.0) * 1000,
+            report.get('parse_s', 0.0) * 1000,
+            report.get('entries'), report.get('new'), report.get('error'),
+        ))
+
+        window = conn.execute('''
+            SELECT outcome, total_ms, entries_seen FROM feed_fetch_log
+            WHERE feed_name = ? ORDER BY id DESC LIMIT ?
+        ''', (feed_name, ROLLING_WINDOW)).fetchall()
+        latencies = sorted(r['total_ms'] for r in window if r['outcome'] != 'error' and r['total_ms'])
+        entries = [r['entries_seen'] for r in window if r['outcome'] == 'ok' and r['entries_seen'] is not None]
+        prev = conn.execute(
+            'SELECT failure_streak, last_success_at, total_new_items FROM feed_health WHERE feed_name = ?',
+            (feed_name,)
+        ).fetchone()
+        prev_streak = (prev['failure_streak'] or 0) if prev else 0
+        prev_success = prev['last_success_at'] if prev else None
+        prev_new = (prev['total_new_items'] or 0) if prev else 0
+        streak = prev_streak + 1 if failed else 0
+        last_success = prev_success if failed else now
+        total_new = prev_new + (report.get('new') or 0)
+
+        conn.execute('''
+            INSERT INTO feed_health
+            (feed_name, feed_url, last_fetched_at, last_outcome, last_status_code, last_error,
+             last_success_at, failure_streak, window_attempts, window_failures,
+             p50_ms, p95_ms, avg_entries, total_new_items)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(feed_name) DO UPDATE SET
+                feed_url = excluded.feed_url,
+                last_fetched_at = excluded.last_fetched_at,
+                last_outcome = excluded.last_outcome,
+                last_status_code = excluded.last_status_code,
+                last_error = excluded.last_error,
+                last_success_at = excluded.last_success_at,
+                failure_streak = excluded.failure_streak,
+                window_attempts = excluded.window_attempts,
+                window_failures = excluded.window_failures,
+                p50_ms = excluded.p50_ms,
+                p95_ms = excluded.p95_ms,
+                avg_entries = excluded.avg_entries,
+                total_new_items = excluded.total_new_items
+        ''', (
+            feed_name, feed_url, now, report.get('outcome'), report.get('status_code'),
+            report.get('error'), last_success, streak,
+            len(window), sum(1 for r in window if r['outcome'] == 'error'),
+            _percentile(latencies, 50), _percentile(latencies, 95),
+            sum(entries) / len(entries) if entries else None,
+            total_new,
+        ))
+    conn.close()
+
+
+def load_health():
+    """读取全部源的健康聚合: {feed_name: row_dict}"""
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    try:
+        rows = conn.execute('SELECT * FROM feed_health').fetchall()
+    except sqlite3.OperationalError:
+        rows = []
+    finally:
+        conn.close()
+    return {r['feed_name']: dict(r) for r in rows}
+
+
+def cleanup_fetch_log(days=LOG_RETENTION_DAYS):
+    """删除超过 days 天的抓取明细（聚合表不受影响）"""
+    cutoff = datetime.now() - timedelta(days=days)
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        cur = conn.execute('DELETE FROM feed_fetch_log WHERE fetched_at < ?', (cutoff,))
+        deleted = cur.rowcount
+        conn.commit()
+    except sqlite3.OperationalError:
+        deleted = 0
+    finally:
+        conn.close()
+    return deleted
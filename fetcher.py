@@ -10,17 +10,29 @@ from datetime import datetime
 import time
 import sqlite3
 import os
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
 
-# 过滤非法XML控制字符
-def _clean_xml_bytes(data: bytes) -> bytes:
-    return bytes(
-        b for b in data
-        if b in (9, 10, 13) or b >= 32
-    )
+import dedup
+import feed_scheduler
+import feed_stream
+import feed_telemetry
+import http_client
+from db import upsert_articles
+from xml_sanitizer import clean_xml_bytes
 
 # ========== 数据库配置 ==========
 DB_PATH = os.path.join(os.path.dirname(__file__), 'data', 'ai_rss.db')
 
+# ========== 并发抓取配置 ==========
+FETCH_WORKERS = 8       # 并发模式下的全局并发上限
+FETCH_PER_HOST = 2      # 同一主机的并发上限（RSSHub 上挂了很多源，别把它打爆）
+
+# SQLite 只允许单写者，并发模式下串行化写库
+_DB_WRITE_LOCK = threading.Lock()
+
 def init_db():
     """确保数据库和表存在"""
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
@@ -51,70 +63,160 @@ def init_db():
     c.execute('CREATE INDEX IF NOT EXISTS idx_published_date ON articles(published_date)')
     c.execute('CREATE INDEX IF NOT EXISTS idx_feed_name ON articles(feed_name)')
     c.execute('CREATE INDEX IF NOT EXISTS idx_last_seen ON articles(last_seen)')
+    c.execute(_FEED_STATE_SQL)
+    c.execute(_FEED_SEEN_SQL)
+    dedup.init_dedup(conn)
+    # 首次建表时用已入库文章的链接做种子，避免老文章被当成新文章
+    if c.execute('SELECT 1 FROM feed_seen LIMIT 1').fetchone() is None:
+        c.execute('''
+            INSERT OR IGNORE INTO feed_seen (feed_name, item_key, first_seen)
+            SELECT feed_name, article_link, COALESCE(created_at, CURRENT_TIMESTAMP)
+            FROM articles
+            WHERE feed_name IS NOT NULL AND article_link IS NOT NULL AND article_link != ''
+        ''')
     conn.commit()
     conn.close()
 
-def get_latest_published_time(feed_name):
-    """获取某个源最新的文章发布时间"""
+# ========== 已见条目集合（GUID / 链接）=========
+
+# 每个源见过的条目标识（GUID 和链接各一行），每轮抓取开始时整体载入内存
+_FEED_SEEN_SQL = '''
+    CREATE TABLE IF NOT EXISTS feed_seen (
+        feed_name TEXT NOT NULL,
+        item_key TEXT NOT NULL,
+        first_seen TIMESTAMP,
+        PRIMARY KEY (feed_name, item_key)
+    ) WITHOUT ROWID
+'''
+SEEN_RETENTION_DAYS = 180   # 已见标识保留天数（远长于任何源的条目保留期）
+
+def load_seen_keys(feed_name=None):
+    """载入已见条目标识：{feed_name: set(item_key)}；指定 feed_name 时只载入该源"""
     conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''
-        SELECT MAX(published_date) FROM articles 
-        WHERE feed_name = ? AND published_date IS NOT NULL
-    ''', (feed_name,))
-    result = c.fetchone()[0]
+    seen = {}
+    try:
+        if feed_name is None:
+            rows = conn.execute('SELECT feed_name, item_key FROM feed_seen')
+        else:
+            rows = conn.execute(
+                'SELECT feed_name, item_key FROM feed_seen WHERE feed_name = ?', (feed_name,)
+            )
+        for name, key in rows:
+            seen.setdefault(name, set()).add(key)
+    except sqlite3.OperationalError:
+        pass  # 表还没建（未跑过 init_db）
+    finally:
+        conn.close()
+    return seen
+
+def save_seen_keys(feed_name, keys):
+    """记录本轮新见到的条目标识"""
+    if not keys:
+        return
+    now = datetime.now()
+    conn = sqlite3.connect(DB_PATH)
+    with conn:
+        conn.execute(_FEED_SEEN_SQL)
+        conn.executemany(
+            'INSERT OR IGNORE INTO feed_seen (feed_name, item_key, first_seen) VALUES (?, ?, ?)',
+            [(feed_name, key, now) for key in keys]
+        )
     conn.close()
-    return result
 
-def save_articles_to_db(articles_list, feed_name, feed_url, criteria=""):
-    """保存文章列表到数据库（增量）"""
+def _entry_keys(entry):
+    """条目的标识：优先 GUID/id，再加上链接（两者任一命中即视为已见）"""
+    keys = []
+    guid = entry.get('id')
+    if guid:
+        keys.append(guid)
+    link = entry.get('link')
+    if link and link != guid:
+        keys.append(link)
+    return keys
+
+# ========== 条件请求缓存（ETag / Last-Modified）=========
+
+# 每个源一行：上次响应的 ETag、Last-Modified 和正文哈希
+_FEED_STATE_SQL = '''
+    CREATE TABLE IF NOT EXISTS feed_state (
+        feed_name TEXT PRIMARY KEY,
+        feed_url TEXT,
+        etag TEXT,
+        last_modified TEXT,
+        body_hash TEXT,
+        last_checked TIMESTAMP,
+        last_changed TIMESTAMP
+    )
+'''
+
+def get_feed_state(feed_name, feed_url):
+    """读取某个源的HTTP缓存状态；源URL变更过则视为无状态"""
     conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    saved_count = 0
+    conn.row_factory = sqlite3.Row
+    try:
+        row = conn.execute(
+            'SELECT * FROM feed_state WHERE feed_name = ?', (feed_name,)
+        ).fetchone()
+    except sqlite3.OperationalError:
+        # 表还没建（未跑过 init_db）
+        row = None
+    finally:
+        conn.close()
+    if row is None or row['feed_url'] != feed_url:
+        return None
+    return dict(row)
+
+def save_feed_state(feed_name, feed_url, etag=None, last_modified=None, body_hash=None, changed=True):
+    """
+    记录本次抓取后的HTTP缓存状态
+    changed=False: 仅刷新 last_checked（304 或正文哈希未变）
+    """
     now = datetime.now()
-    
-    for article in articles_list:
-        try:
-            # 先检查是否已存在
-            c.execute('SELECT id FROM articles WHERE article_link = ?', (article.get('link', ''),))
-            existing = c.fetchone()
-            
-            if existing:
-                # 已存在，更新 last_seen
-                c.execute('''
-                    UPDATE articles 
-                    SET last_seen = ? 
-                    WHERE id = ?
-                ''', (now, existing[0]))
-            else:
-                # 不存在，插入新文章
-                c.execute('''
-                    INSERT INTO articles 
-                    (feed_name, feed_url, article_title, article_link, published_date, raw_content, criteria, last_seen)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    feed_name,
-                    feed_url,
-                    article.get('title', '无标题'),
-                    article.get('link', ''),
-                    article.get('published', datetime.now()),
-                    article.get('summary', '')[:2000],
-                    criteria,
-                    now
-                ))
-                saved_count += 1
-                
-        except Exception as e:
-            print(f"    ⚠️ 保存失败: {e}")
-    
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute(_FEED_STATE_SQL)
+    if changed:
+        c.execute('''
+            INSERT INTO feed_state
+            (feed_name, feed_url, etag, last_modified, body_hash, last_checked, last_changed)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(feed_name) DO UPDATE SET
+                feed_url = excluded.feed_url,
+                etag = excluded.etag,
+                last_modified = excluded.last_modified,
+                body_hash = excluded.body_hash,
+                last_checked = excluded.last_checked,
+                last_changed = excluded.last_changed
+        ''', (feed_name, feed_url, etag, last_modified, body_hash, now, now))
+    else:
+        c.execute(
+            'UPDATE feed_state SET last_checked = ? WHERE feed_name = ?',
+            (now, feed_name)
+        )
     conn.commit()
     conn.close()
-    return saved_count
+
+def save_articles_to_db(articles_list, feed_name, feed_url, criteria="", redirects=None):
+    """
+    保存文章列表到数据库（增量，单事务批量 upsert），返回 (新增条数, 并入已有重复组的条数)
+    新文章随即归入重复组（redirects 为写锁外预先解析好的短链跳转）
+    """
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        saved_count, _ = upsert_articles(
+            conn, articles_list, feed_name, feed_url, criteria, summary_limit=2000
+        )
+        dedup.save_redirects(conn, redirects)
+        merged = dedup.assign_groups(conn, [a.get('link', '') for a in articles_list])
+        conn.commit()
+    finally:
+        conn.close()
+    return saved_count, merged
 
 # ========== RSS抓取核心（增量版）=========
 
-def fetch_articles_from_feed(feed_url, feed_name, max_retries=3, max_entries=30):
+def fetch_articles_from_feed(feed_url, feed_name, max_retries=3, max_entries=30, log=print,
+                             conditional=True, report=None, seen=None, stream=True):
     """
     增量抓取RSS源 - 只抓取最新文章
     
@@ -123,54 +225,119 @@ def fetch_articles_from_feed(feed_url, feed_name, max_retries=3, max_entries=30)
         feed_name: 源的名字（用于日志输出）
         max_retries: 网络请求失败时的最大重试次数
         max_entries: 每次最多处理多少篇（防止某些源一次性推送太多）
+        log: 日志输出函数（并发模式下先缓冲，抓完再整块打印）
+        conditional: 是否使用条件请求（ETag/Last-Modified/正文哈希），
+                     源未变化时直接跳过解析与入库；False 时强制全量
+        report: 可选的 dict，填入本次抓取结果供调度器使用：
+                outcome ('ok'/'unchanged'/'error')、new_times（新文章发布时间，epoch 秒）、
+                fetch_s / parse_s / db_s（下载、解析、入库耗时，秒）、
+                status_code / bytes / ttfb_s / attempts / entries / new / error（写入健康遥测）
+        seen: 该源已见条目标识的集合（fetch_all_feeds 每轮统一载入一次）；
+              不传时从数据库单独载入。本轮新条目会被加入该集合
+        stream: 流式读取，读满 max_entries 条或连续遇到已见条目就停止下载（见 feed_stream.py）；
+                False 时读完整个文档（适用于按时间正序排列、新条目在末尾的源）
     
     返回:
         新增文章数量
     """
     
-    # 获取这个源最新的文章时间
-    latest_time = get_latest_published_time(feed_name)
-    if latest_time:
-        print(f"  ├─ 📅 上次最新文章: {latest_time}")
+    if seen is None:
+        seen = load_seen_keys(feed_name).get(feed_name, set())
+    if seen:
+        log(f"  ├─ 📚 已见条目: {len(seen)} 条")
     
     new_articles = []
+    new_keys = []
+    if report is None:
+        report = {}
+    report['outcome'] = 'error'
+    report['new_times'] = []
+    report['fetch_s'] = report['parse_s'] = report['db_s'] = 0.0
+    report.update(status_code=None, bytes=0, ttfb_s=None, attempts=0, entries=0, new=0, error=None)
+    state = get_feed_state(feed_name, feed_url) if conditional else None
+    unchanged = False
+    new_state = None
     
     for attempt in range(max_retries):
         try:
-            # 设置请求头
+            # 设置请求头（UA / 压缩 / keep-alive 由共享 Session 统一设置）
             headers = {
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
                 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-                'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-                'Connection': 'keep-alive',
             }
+            if state:
+                if state['etag']:
+                    headers['If-None-Match'] = state['etag']
+                if state['last_modified']:
+                    headers['If-Modified-Since'] = state['last_modified']
             
-            print(f"  ├─ 抓取 {feed_name} (尝试 {attempt + 1}/{max_retries})...")
-            response = requests.get(feed_url, headers=headers, timeout=30)
-            response.raise_for_status()
+            log(f"  ├─ 抓取 {feed_name} (尝试 {attempt + 1}/{max_retries})...")
+            report['attempts'] = attempt + 1
+            t0 = time.perf_counter()
+            response = None
+            try:
+                response = http_client.get(feed_url, headers=headers, stream=True)
+                report['status_code'] = response.status_code
+                # requests 不单独暴露 DNS/建连耗时，elapsed 是发出请求到收完响应头（含建连）
+                report['ttfb_s'] = response.elapsed.total_seconds()
+                if response.status_code != 304:
+                    response.raise_for_status()
+                    # 边下边数条目，只读用得到的前一截（截断时正文哈希也按这一截算）
+                    content, stream_info = feed_stream.read_feed(
+                        response,
+                        max_entries=max_entries if stream else None,
+                        seen=seen if stream else None,
+                    )
+                    report['bytes'] = stream_info['bytes_read']
+            finally:
+                if response is not None:
+                    response.close()
+                report['fetch_s'] += time.perf_counter() - t0
+            if response.status_code == 304:
+                log(f"  ├─ 💤 未变化 (304)，跳过解析")
+                unchanged = True
+                break
+            if stream_info['truncated']:
+                log(f"  ├─ ✂️ 流式截断（{stream_info['truncated']}）: "
+                    f"读取 {stream_info['items']} 条 / {stream_info['bytes_read'] // 1024} KB")
+            
+            body_hash = hashlib.sha256(content).hexdigest()
+            if state and state['body_hash'] == body_hash:
+                log(f"  ├─ 💤 正文未变化，跳过解析")
+                unchanged = True
+                break
+            fetched_state = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'body_hash': body_hash,
+            }
             
             # 解析RSS（必要时清洗非法字符）
-            content = response.content
+            t0 = time.perf_counter()
             feed_data = feedparser.parse(content)
             if feed_data.bozo:
-                print(f"  ├─ 警告: 解析有小问题，尝试清洗非法字符...")
-                cleaned = _clean_xml_bytes(content)
-                if cleaned != content:
+                log(f"  ├─ 警告: 解析有小问题，尝试清洗非法字符...")
+                cleaned = clean_xml_bytes(content)
+                if len(cleaned) != len(content):
                     feed_data = feedparser.parse(cleaned)
             
             if feed_data.bozo:
-                print(f"  ├─ 警告: 解析仍有问题，但继续...")
+                log(f"  ├─ 警告: 解析仍有问题，但继续...")
             
             total_entries = len(feed_data.entries)
-            print(f"  ├─ RSS包含 {total_entries} 篇文章")
+            report['entries'] = total_entries
+            log(f"  ├─ RSS包含 {total_entries} 篇文章")
             
             # 只处理最新的 max_entries 篇
             entries_to_process = feed_data.entries[:max_entries]
             
-            # 提取文章信息，只保留比 latest_time 新的
+            # 提取文章信息，只保留没见过的条目（集合成员判断，不依赖发布时间）
             new_count = 0
             for entry in entries_to_process:
-                # 处理发布时间
+                keys = _entry_keys(entry)
+                if not keys or any(k in seen for k in keys):
+                    continue
+                
+                # 处理发布时间（只对新条目做）
                 published_time = None
                 for time_field in ['published_parsed', 'updated_parsed', 'created_parsed']:
                     if hasattr(entry, time_field) and getattr(entry, time_field):
@@ -180,17 +347,6 @@ def fetch_articles_from_feed(feed_url, feed_name, max_retries=3, max_entries=30)
                 if not published_time:
                     published_time = datetime.now()
                 
-                # 增量判断：如果有上次时间，且这篇文章更旧，跳过
-                if latest_time:
-                    # 将latest_time字符串转换为datetime对象进行比较
-                    try:
-                        latest_dt = datetime.strptime(latest_time, '%Y-%m-%d %H:%M:%S')
-                        if published_time <= latest_dt:
-                            continue
-                    except ValueError:
-                        # 如果时间格式不匹配，跳过比较
-                        pass
-                
                 # 构建文章字典
                 article = {
                     'title': entry.get('title', '无标题'),
@@ -199,25 +355,44 @@ def fetch_articles_from_feed(feed_url, feed_name, max_retries=3, max_entries=30)
                     'summary': entry.get('summary', entry.get('description', ''))[:2000],
                 }
                 new_articles.append(article)
+                new_keys.extend(keys)
+                seen.update(keys)  # 同一文档内重复的条目只算一次
                 new_count += 1
             
-            print(f"  ├─ 🔍 发现 {new_count} 篇新文章")
+            report['parse_s'] += time.perf_counter() - t0
+            log(f"  ├─ 🔍 发现 {new_count} 篇新文章")
             
             # 抓取成功，跳出重试循环
+            new_state = fetched_state
+            report['outcome'] = 'ok'
+            report['new_times'] = [a['published'].timestamp() for a in new_articles]
+            report['new'] = len(new_articles)
+            report['error'] = None
             break
             
         except requests.exceptions.Timeout:
-            print(f"  ├─ 超时")
+            log(f"  ├─ 超时")
+            report['error'] = '超时'
             if attempt < max_retries - 1:
                 time.sleep(3)
         except requests.exceptions.RequestException as e:
-            print(f"  ├─ 网络错误: {e}")
+            log(f"  ├─ 网络错误: {e}")
+            report['error'] = f"网络错误: {str(e)[:200]}"
             break
         except Exception as e:
-            print(f"  ├─ 解析错误: {e}")
+            log(f"  ├─ 解析错误: {e}")
+            report['error'] = f"解析错误: {str(e)[:200]}"
             break
     
+    if unchanged:
+        report['outcome'] = 'unchanged'
+        with _DB_WRITE_LOCK:
+            save_feed_state(feed_name, feed_url, changed=False)
+        log(f"  ├─ ✨ 没有新文章")
+        return 0
+    
     # ========== 保存到数据库 ==========
+    saved_ok = True
     if new_articles:
         try:
             # 从config.py获取criteria
@@ -231,14 +406,33 @@ def fetch_articles_from_feed(feed_url, feed_name, max_retries=3, max_entries=30)
             except ImportError:
                 criteria = ""
             
+            # 短链跳转在写锁外解析（有网络请求）
+            redirects = dedup.resolve_redirects([a['link'] for a in new_articles])
+            
             # 保存到数据库
-            saved = save_articles_to_db(new_articles, feed_name, feed_url, criteria)
-            print(f"  ├─ 💾 新增 {saved} 篇")
+            with _DB_WRITE_LOCK:
+                t0 = time.perf_counter()
+                saved, merged = save_articles_to_db(new_articles, feed_name, feed_url, criteria, redirects)
+                save_seen_keys(feed_name, new_keys)
+                report['db_s'] += time.perf_counter() - t0
+            log(f"  ├─ 💾 新增 {saved} 篇")
+            if merged:
+                log(f"  ├─ 🔗 其中 {merged} 篇与其他源重复，归入已有分组")
             
         except Exception as e:
-            print(f"  ├─ ⚠️ 数据库保存失败: {e}")
+            saved_ok = False
+            seen.difference_update(new_keys)  # 没存进去，下次还要当新条目
+            log(f"  ├─ ⚠️ 数据库保存失败: {e}")
     else:
-        print(f"  ├─ ✨ 没有新文章")
+        log(f"  ├─ ✨ 没有新文章")
+    
+    # 入库成功后才记住缓存状态，否则下次会误判为"未变化"而漏掉文章
+    if new_state and saved_ok:
+        try:
+            with _DB_WRITE_LOCK:
+                save_feed_state(feed_name, feed_url, **new_state)
+        except Exception as e:
+            log(f"  ├─ ⚠️ 缓存状态保存失败: {e}")
     
     return len(new_articles)
 
@@ -247,98 +441,15 @@ def fetch_articles_from_feed(feed_url, feed_name, max_retries=3, max_entries=30)
 
 def fetch_full_text_for_recent(limit=50, max_age_days=7):
     """
-    为最近未抓取全文的文章补全正文
+    为最近未抓取全文的文章补全正文（交给 fulltext_fetcher 的统一全文引擎）
     只处理最近 max_age_days 天内的文章
     """
-    
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    # 只处理最近的文章，避免抓取太旧的
-    cutoff_date = datetime.now().timestamp() - (max_age_days * 24 * 3600)
-    
-    c.execute('''
-        SELECT id, article_link, article_title, feed_name
-        FROM articles 
-        WHERE (content IS NULL OR content = '' OR fulltext_fetched = 0)
-        AND article_link IS NOT NULL
-        AND article_link != ''
-        AND (published_date IS NULL OR strftime('%s', published_date) > ?)
-        ORDER BY 
-            CASE WHEN fulltext_fetched = -1 THEN 1 ELSE 0 END,
-            published_date DESC 
-        LIMIT ?
-    ''', (cutoff_date, limit))
-    
-    articles = c.fetchall()
-    
-    if not articles:
-        print(f"  ├─ 📄 没有需要抓取全文的文章")
-        conn.close()
-        return 0
-    
-    print(f"  ├─ 📄 需要抓取全文: {len(articles)} 篇")
-    
     try:
-        from bs4 import BeautifulSoup
-        from readability import Document
-        import trafilatura
+        from fulltext_fetcher import update_articles_with_fulltext
     except ImportError:
         print(f"  ├─ ⚠️ 缺少依赖库")
-        conn.close()
         return 0
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
-    }
-    
-    success_count = 0
-    for article_id, url, title, feed_name in articles:
-        print(f"   抓取: {feed_name} - {title[:40]}...")
-        
-        full_text = None
-        
-        # 策略1: trafilatura
-        try:
-            downloaded = trafilatura.fetch_url(url, headers=headers)
-            if downloaded:
-                text = trafilatura.extract(downloaded, include_comments=False)
-                if text and len(text) > 200:
-                    full_text = text
-        except Exception:
-            pass
-        
-        # 策略2: readability
-        if not full_text:
-            try:
-                resp = requests.get(url, headers=headers, timeout=15)
-                doc = Document(resp.text)
-                soup = BeautifulSoup(doc.summary(), 'html.parser')
-                text = soup.get_text()
-                if len(text) > 200:
-                    full_text = text
-            except Exception:
-                pass
-        
-        if full_text:
-            c.execute('''
-                UPDATE articles 
-                SET content = ?, fulltext_fetched = 1 
-                WHERE id = ?
-            ''', (full_text[:30000], article_id))
-            conn.commit()
-            success_count += 1
-            print(f"      ✅ 成功")
-        else:
-            c.execute('UPDATE articles SET fulltext_fetched = -1 WHERE id = ?', (article_id,))
-            conn.commit()
-            print(f"      ❌ 失败")
-        
-        time.sleep(1)
-    
-    conn.close()
-    print(f"  ├─ ✅ 完成: {success_count}/{len(articles)}")
-    return success_count
+    return update_articles_with_fulltext(limit=limit, days=max_age_days)
 
 
 # ========== 清理旧文章（可选）=========
@@ -355,42 +466,181 @@ def cleanup_old_articles(days=30):
     ''', (cutoff,))
     
     deleted = c.rowcount
+    try:
+        c.execute('DELETE FROM article_bodies WHERE article_id NOT IN (SELECT id FROM articles)')
+    except sqlite3.OperationalError:
+        pass  # 没开压缩存储，表还没建
+    
+    # 已见标识保留得更久，防止源里残留的旧条目被当成新文章重新入库
+    seen_cutoff = datetime.now().timestamp() - (max(days, SEEN_RETENTION_DAYS) * 24 * 3600)
+    try:
+        c.execute("DELETE FROM feed_seen WHERE strftime('%s', first_seen) < ?", (seen_cutoff,))
+    except sqlite3.OperationalError:
+        pass  # 表还没建
     conn.commit()
     conn.close()
+    feed_telemetry.cleanup_fetch_log()
     print(f"🧹 清理了 {deleted} 篇超过 {days} 天未出现的旧文章")
     return deleted
 
 
 # ========== 批量抓取所有源 ==========
 
-def fetch_all_feeds(max_entries_per_feed=30):
-    """抓取所有配置的源（增量模式）"""
+class _HostLimiter:
+    """按主机名发放信号量，限制同一主机的并发请求数"""
+
+    def __init__(self, per_host):
+        self._per_host = per_host
+        self._lock = threading.Lock()
+        self._sems = {}
+
+    def __call__(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            sem = self._sems.get(host)
+            if sem is None:
+                sem = self._sems[host] = threading.BoundedSemaphore(self._per_host)
+        return sem
+
+
+def _interleave_by_host(jobs):
+    """按主机轮转排序，避免同主机的源扎堆占满全局并发槽位"""
+    buckets = {}
+    for job in jobs:
+        host = urlsplit(job[1]['url']).netloc.lower()
+        buckets.setdefault(host, []).append(job)
+    queues = list(buckets.values())
+    ordered = []
+    while queues:
+        for q in queues:
+            ordered.append(q.pop(0))
+        queues = [q for q in queues if q]
+    return ordered
+
+
+def _fetch_and_schedule(feed, max_entries, conditional, seen, stats=None, log=print):
+    """抓取单个源，并把结果交给调度器计算下次到期时间；stats 不为空时累加各阶段耗时"""
+    report = {}
+    new = fetch_articles_from_feed(
+        feed['url'],
+        feed['name'],
+        max_entries=max_entries,
+        log=log,
+        conditional=conditional,
+        report=report,
+        seen=seen[feed['name']],
+        stream=feed.get('stream', True),
+    )
     try:
-        from config import RSS_FEEDS
-    except ImportError:
-        print("❌ 找不到 config.py")
-        return
+        with _DB_WRITE_LOCK:
+            if stats is not None:
+                stats['feeds'] = stats.get('feeds', 0) + 1
+                stats[report['outcome']] = stats.get(report['outcome'], 0) + 1
+                for key in ('fetch_s', 'parse_s', 'db_s'):
+                    stats[key] = stats.get(key, 0.0) + report[key]
+            feed_scheduler.record_poll(feed['name'], report['outcome'], report['new_times'])
+            feed_telemetry.record_fetch(feed['name'], feed['url'], report)
+    except Exception as e:
+        log(f"  ├─ ⚠️ 调度/遥测状态保存失败: {e}")
+    return new
+
+
+def _fetch_all_concurrent(jobs, total, max_entries_per_feed, workers, per_host, conditional, seen,
+                          stats=None):
+    """并发抓取：全局最多 workers 个请求，同一主机最多 per_host 个。
+    每个源的日志先缓冲，抓完后整块输出，保持与顺序模式相同的日志格式。"""
+    host_limiter = _HostLimiter(per_host)
+    print_lock = threading.Lock()
+
+    def _run(i, feed):
+        lines = []
+        try:
+            with host_limiter(feed['url']):
+                new = _fetch_and_schedule(feed, max_entries_per_feed, conditional, seen, stats,
+                                          log=lines.append)
+        except Exception as e:
+            lines.append(f"  ├─ ❌ 抓取异常: {e}")
+            new = 0
+        with print_lock:
+            print(f"\n[{i}/{total}] {feed['name']}")
+            for line in lines:
+                print(line)
+        return new
+
+    total_new = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_run, i, feed) for i, feed in _interleave_by_host(jobs)]
+        for future in as_completed(futures):
+            total_new += future.result()
+    return total_new
+
+
+def fetch_all_feeds(max_entries_per_feed=30, workers=1, per_host=FETCH_PER_HOST, conditional=True,
+                    due_only=False, feeds=None, delay=1, stats=None):
+    """
+    抓取所有配置的源（增量模式）
+
+    workers: 1 为顺序抓取（默认）；大于 1 时启用并发抓取，
+             整轮耗时约等于最慢的那个源
+    per_host: 并发模式下同一主机的并发上限
+    conditional: False 时忽略 ETag/正文哈希缓存，强制全量解析
+    due_only: 只抓调度器判定已到期的源（见 feed_scheduler.py）
+    feeds: 要抓的源列表，默认取 config.RSS_FEEDS
+    delay: 顺序模式下源之间的间隔秒数
+    stats: 可选的 dict，累加抓到的源数、各结果计数和下载/解析/入库耗时
+    """
+    if feeds is not None:
+        RSS_FEEDS = feeds
+    else:
+        try:
+            from config import RSS_FEEDS
+        except ImportError:
+            print("❌ 找不到 config.py")
+            return
     
     def _is_enabled(feed):
         return feed.get("enabled", True) is not False
 
+    init_db()
+    feed_scheduler.init_schedule_table()
+    feed_telemetry.init_telemetry_tables()
+
     print("=" * 60)
-    print(f"🚀 开始增量抓取 {len(RSS_FEEDS)} 个源")
+    mode = f"并发×{workers}" if workers > 1 else "顺序"
+    print(f"🚀 开始增量抓取 {len(RSS_FEEDS)} 个源（{mode}）")
     print("=" * 60)
     
-    total_new = 0
+    total = len(RSS_FEEDS)
+    not_due = set()
+    if due_only:
+        _, waiting = feed_scheduler.due_feeds(RSS_FEEDS)
+        not_due = {feed['name'] for feed in waiting}
+    jobs = []
     for i, feed in enumerate(RSS_FEEDS, 1):
         if not _is_enabled(feed):
-            print(f"\n[{i}/{len(RSS_FEEDS)}] {feed['name']} (已禁用，跳过)")
+            print(f"\n[{i}/{total}] {feed['name']} (已禁用，跳过)")
             continue
-        print(f"\n[{i}/{len(RSS_FEEDS)}] {feed['name']}")
-        new = fetch_articles_from_feed(
-            feed['url'], 
-            feed['name'], 
-            max_entries=max_entries_per_feed
-        )
-        total_new += new
-        time.sleep(1)
+        if feed['name'] in not_due:
+            continue
+        jobs.append((i, feed))
+    if due_only:
+        print(f"⏰ 本轮到期 {len(jobs)} 个源，未到期跳过 {len(not_due)} 个")
+
+    # 每轮只载入一次全部源的已见标识（{feed_name: set}）
+    seen = load_seen_keys()
+    for _, feed in jobs:
+        seen.setdefault(feed['name'], set())
+
+    total_new = 0
+    if workers > 1:
+        total_new = _fetch_all_concurrent(jobs, total, max_entries_per_feed, workers, per_host,
+                                          conditional, seen, stats)
+    else:
+        for i, feed in jobs:
+            print(f"\n[{i}/{total}] {feed['name']}")
+            new = _fetch_and_schedule(feed, max_entries_per_feed, conditional, seen, stats)
+            total_new += new
+            time.sleep(delay)
     
     print("\n" + "=" * 60)
     print(f"✅ 抓取完成，共新增 {total_new} 篇文章")
@@ -401,20 +651,32 @@ def fetch_all_feeds(max_entries_per_feed=30):
 # ========== 命令行入口 ==========
 
 if __name__ == "__main__":
-    import sys
-    
-    if len(sys.argv) > 1:
-        if sys.argv[1] == "--fulltext":
-            print("📄 运行全文抓取...")
-            fetch_full_text_for_recent(limit=50)
-        elif sys.argv[1] == "--cleanup":
-            days = int(sys.argv[2]) if len(sys.argv) > 2 else 30
-            cleanup_old_articles(days)
-        elif sys.argv[1] == "--init":
-            init_db()
-            print("✅ 数据库初始化完成")
-        else:
-            print("用法: python fetcher.py [--fulltext|--cleanup [天数]|--init]")
+    import argparse
+
+    parser = argparse.ArgumentParser(description="增量抓取所有RSS源")
+    parser.add_argument("--fulltext", action="store_true", help="为最近文章补全全文")
+    parser.add_argument("--cleanup", type=int, nargs="?", const=30, default=None, metavar="天数",
+                        help="删除超过N天未出现的旧文章（默认30天）")
+    parser.add_argument("--init", action="store_true", help="初始化数据库")
+    parser.add_argument("--force", action="store_true", help="忽略条件请求缓存，强制全量解析")
+    parser.add_argument("--workers", type=int, nargs="?", const=FETCH_WORKERS, default=1,
+                        metavar="并发数", help=f"并发抓取（默认 {FETCH_WORKERS}）")
+    parser.add_argument("--due", action="store_true", help="只抓调度器判定已到期的源")
+    args = parser.parse_args()
+
+    if args.fulltext:
+        print("📄 运行全文抓取...")
+        fetch_full_text_for_recent(limit=50)
+    elif args.cleanup is not None:
+        cleanup_old_articles(args.cleanup)
+    elif args.init:
+        init_db()
+        print("✅ 数据库初始化完成")
     else:
         # 默认：增量抓取所有源
-        fetch_all_feeds(max_entries_per_feed=30)
+        fetch_all_feeds(
+            max_entries_per_feed=30,
+            workers=args.workers,
+            conditional=not args.force,
+            due_only=args.due,
+        )
@@ -3,12 +3,13 @@
 
 import feedparser
 import sqlite3
-import requests
 from datetime import datetime
 import time
 import sys
 import os
 
+import http_client
+
 def parse_date(date_str):
     """统一将各种日期格式转换为字符串"""
     if not date_str:
@@ -77,10 +78,10 @@ def fetch_articles():
             
             # 抓取RSS
             print(f"  ├─ 抓取 {feed_url}")
-            feed_data = feedparser.parse(feed_url)
-            
-            if hasattr(feed_data, 'status') and feed_data.status != 200:
-                print(f"  ├─ ⚠️ HTTP状态码: {feed_data.status}")
+            response = http_client.get(feed_url)
+            if response.status_code != 200:
+                print(f"  ├─ ⚠️ HTTP状态码: {response.status_code}")
+            feed_data = feedparser.parse(response.content)
             
             entries = feed_data.entries[:30]  # 取最新30条
             print(f"  ├─ RSS包含 {len(entries)} 篇文章")
@@ -136,35 +137,9 @@ def fetch_articles():
     return total_new
 
 def fetch_fulltext():
-    """抓取全文"""
-    conn = sqlite3.connect('data/ai_rss.db')
-    c = conn.cursor()
-    
-    c.execute('''
-        SELECT id, article_link FROM articles 
-        WHERE fulltext_fetched = 0 AND article_link IS NOT NULL
-        LIMIT 50
-    ''')
-    
-    articles = c.fetchall()
-    print(f"\n📖 需要抓取全文: {len(articles)} 篇")
-    
-    for article_id, link in articles:
-        try:
-            print(f"   抓取: {link}")
-            # 这里添加您的全文抓取逻辑
-            c.execute('''
-                UPDATE articles 
-                SET fulltext_fetched = 1, 
-                    last_seen = ?
-                WHERE id = ?
-            ''', (datetime.now().isoformat(), article_id))
-            conn.commit()
-        except Exception as e:
-            print(f"   ❌ 抓取失败: {e}")
-            conn.rollback()
-    
-    conn.close()
+    """抓取全文（交给 fulltext_fetcher 的统一全文引擎）"""
+    from fulltext_fetcher import update_articles_with_fulltext
+    return update_articles_with_fulltext(limit=50)
 
 if __name__ == '__main__':
     print("🚀 启动修复版 fetcher（日期比较已修复）")
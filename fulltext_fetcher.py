@@ -2,93 +2,456 @@
 """
 全文抓取模块 - 解决RSS只有摘要的问题
 使用多个备选方案，确保拿到完整正文
+
+这是唯一的全文引擎（fetcher.py --fulltext 和 criteria_judge 的预抓也走这里）
+每篇文章的全文状态 fulltext_status:
+    pending         还没抓过（NULL 等同 pending）
+    ok              已拿到全文
+    failed          失败，到 fulltext_retry_at 之后再试（间隔按 fulltext_attempts 指数退避）
+    permanent_fail  不再重试（404/410 等，或失败次数达到 MAX_ATTEMPTS）
+fulltext_fetched 仍同步维护（ok 为 1，其余为 0），兼容旧的统计查询
 """
 
 import argparse
+import multiprocessing
 import os
 import re
 import sqlite3
 import time
+from datetime import datetime, timedelta
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+
 import requests
 from bs4 import BeautifulSoup
 from readability import Document
 import trafilatura
 
+import article_bodies
+import dedup
+import html_cache
+import http_client
+from rate_limit import KeyedRateLimiter
+
 DB_PATH = os.path.join(os.path.dirname(__file__), 'data', 'ai_rss.db')
 
-def fetch_full_text(url, retry=2):
+MIN_TEXT_CHARS = 500        # 提取结果短于这个长度视为失败，交给下一个策略
+CONTENT_MAX_CHARS = 30000   # 入库正文的截断长度
+
+# ========== 下载与解析的上限 ==========
+HTML_MAX_BYTES = 4 * 1024 * 1024    # 页面最多下载这么多字节，超出部分直接断开不读（无限归档页等）
+PARSE_MAX_BYTES = 1024 * 1024       # 去掉脚本/样式/内联数据后，最多交给解析器这么多字节
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')  # 其他类型（PDF、图片、JSON…）不下载
+
+# ========== 全文状态 ==========
+FT_PENDING = 'pending'
+FT_OK = 'ok'
+FT_FAILED = 'failed'
+FT_PERMANENT = 'permanent_fail'
+RETRY_BASE_HOURS = 6        # 第一次失败后隔多久再试，之后每次翻倍
+RETRY_MAX_HOURS = 7 * 24    # 重试间隔上限
+MAX_ATTEMPTS = 5            # 累计失败这么多次判为永久失败
+
+# 选文优先级（0-100，见 fulltext_priority）：预算先给全文最可能改变评分结论的文章
+KEEP_THRESHOLD = 50             # 保留线，与 app_ai_filtered.FILTER_THRESHOLD 一致
+KEEP_RATE_WINDOW_DAYS = 60      # 源保留率的统计窗口
+KEEP_RATE_PRIOR = 10            # 平滑：评分样本少的源向全局保留率靠拢（相当于 10 篇先验）
+SUMMARY_ENOUGH_CHARS = 500      # 摘要超过这个长度时，全文对评分帮助不大
+LONG_SUMMARY_FACTOR = 0.3       # 摘要已够长的文章优先级打折
+SCORE_MARGIN = 30               # 已评分文章：离保留线越近越值得补全文，超出这个距离不加分
+RECENCY_HALF_LIFE_DAYS = 3      # 时效分每 3 天减半
+PRIORITY_WEIGHTS = {'relevance': 50, 'summary': 30, 'recency': 20}
+PERMANENT_HTTP_STATUS = {404, 410, 451}  # 这些状态码直接判为永久失败
+
+# ========== 并发模式参数 ==========
+FULLTEXT_WORKERS = 8        # 并发下载线程数
+DOMAIN_RATE = 1.0           # 每个域名每秒最多发起的请求数
+DOMAIN_BURST = 2            # 每个域名允许的瞬时突发
+COMMIT_BATCH = 20           # 每攒多少篇结果提交一次
+
+# ========== 按域名路由提取器 ==========
+ROUTE_WINDOW_DAYS = 60      # 只看最近这么多天的策略记录
+ROUTE_MIN_SAMPLES = 3       # 某策略在该域名上至少试过这么多次才参与排序
+SKIP_MIN_ARTICLES = 5       # 域名试过这么多篇且一篇都没成功 → 判为拿不到全文（付费墙等）
+SKIP_RETRY_DAYS = 7         # 被跳过的域名上次尝试满这么多天后，每次运行只放一篇去试探，其余继续搁置
+
+# 每个策略对每篇文章的结果，既用于观察，也用于按域名学习提取器顺序
+_STRATEGY_LOG_SQL = [
+    '''
+    CREATE TABLE IF NOT EXISTS fulltext_strategy_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        article_link TEXT,
+        domain TEXT,
+        strategy TEXT,
+        outcome TEXT,
+        chars INTEGER,
+        elapsed_ms REAL,
+        attempted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_strategy_log_domain ON fulltext_strategy_log(domain, attempted_at)',
+]
+
+
+# 解析前剔除的大块非正文内容（结构化数据 ld+json 保留给 trafilatura 取元数据）
+_STRIP_BLOCKS_RE = re.compile(
+    rb'<script\b(?![^>]*ld\+json)[^>]*>.*?</script\s*>'
+    rb'|<(style|svg|noscript|template)\b[^>]*>.*?</\1\s*>'
+    rb'|<!--.*?-->',
+    re.IGNORECASE | re.DOTALL
+)
+_DATA_URI_RE = re.compile(rb'data:[\w/+.-]+;base64,[A-Za-z0-9+/=\s]{256,}')
+
+
+def prepare_html(html):
+    """
+    控制解析成本：剔除脚本/样式/SVG/注释和内联 base64 数据，再截到 PARSE_MAX_BYTES
+    输入 bytes 或 str，返回 bytes
+    """
+    if isinstance(html, str):
+        html = html.encode('utf-8')
+    html = _STRIP_BLOCKS_RE.sub(b' ', html)
+    html = _DATA_URI_RE.sub(b'data:,', html)
+    return html[:PARSE_MAX_BYTES]
+
+
+def _extract_trafilatura(html):
+    """trafilatura (最干净，专门提取正文)"""
+    return trafilatura.extract(html, include_comments=False, include_tables=False)
+
+
+def _extract_readability(html):
+    """readability (通用性好)"""
+    summary = Document(html).summary()
+    # 清理HTML标签
+    return BeautifulSoup(summary, 'html.parser').get_text()
+
+
+def _extract_soup(html):
+    """beautifulsoup 暴力提取 (兜底)"""
+    soup = BeautifulSoup(html, 'lxml')
+    # 移除脚本和样式
+    for script in soup(["script", "style", "nav", "header", "footer", "aside"]):
+        script.decompose()
+    text = soup.get_text()
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return ' '.join(chunk for chunk in chunks if chunk)
+
+
+# 按顺序尝试，第一个给出足够长正文的策略胜出
+EXTRACTORS = [
+    ('trafilatura', _extract_trafilatura),
+    ('readability', _extract_readability),
+    ('暴力提取', _extract_soup),
+]
+
+
+class NotCached(LookupError):
+    """离线模式下缓存里没有这个页面"""
+
+
+class NotHTML(requests.exceptions.RequestException):
+    """响应不是网页（PDF、图片等），不下载正文"""
+
+
+def _is_html(response):
+    content_type = (response.headers.get('Content-Type') or '').split(';')[0].strip().lower()
+    return not content_type or content_type in HTML_CONTENT_TYPES
+
+
+def download_html(url, retry=2, cache=True, offline=False):
+    """
+    下载页面原始字节（只下载一次，供所有提取策略共用）
+    流式读取，最多 HTML_MAX_BYTES 字节；响应头不是网页类型时不读正文，抛 NotHTML
+    超时/连接错误时最多尝试 retry 次；返回 bytes，失败抛出最后一次的异常
+    cache: 先查 html_cache，下载成功后写回缓存；False 时不读缓存（仍会写入新下载的内容）
+    offline: 只读缓存，不联网，未命中抛 NotCached
+    """
+    if cache or offline:
+        cached = html_cache.get(url)
+        if cached is not None:
+            return cached
+    if offline:
+        raise NotCached(url)
+    for attempt in range(max(1, retry)):
+        try:
+            response = http_client.get(url, stream=True)
+            try:
+                response.raise_for_status()
+                if not _is_html(response):
+                    raise NotHTML(f"不是网页: {response.headers.get('Content-Type')}")
+                body, truncated = http_client.read_prefix(response, HTML_MAX_BYTES)
+            finally:
+                response.close()
+            break
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+            if attempt >= retry - 1:
+                raise
+    if truncated:
+        print(f"  ✂️ 页面超过 {HTML_MAX_BYTES // (1024 * 1024)}MB，只取前面部分")
+    try:
+        html_cache.put(url, body)
+    except OSError as e:
+        print(f"  ⚠️ 写入 HTML 缓存失败: {e}")
+    return body
+
+
+def extract_text(html, outcomes=None, order=None):
+    """
+    在同一份 HTML 上依次跑 EXTRACTORS，返回第一个足够长的正文（都不行返回 None）
+    outcomes: 可选 list，追加每个策略的结果 {strategy, outcome, chars, elapsed_ms}，
+              outcome 为 'ok' / 'short' / 'error: ...'
+    order: 可选的策略名顺序（见 load_routes），没列出的策略按默认顺序排在后面
+    解析前先经过 prepare_html 控制输入规模
     """
-    多策略全文抓取：
+    html = prepare_html(html)
+    extractors = EXTRACTORS
+    if order:
+        rank = {name: i for i, name in enumerate(order)}
+        extractors = sorted(EXTRACTORS, key=lambda e: rank.get(e[0], len(rank)))
+    for name, extractor in extractors:
+        t0 = time.perf_counter()
+        try:
+            text = extractor(html) or ''
+            outcome = 'ok' if len(text) > MIN_TEXT_CHARS else 'short'
+        except Exception as e:
+            text = ''
+            outcome = f"error: {str(e)[:200]}"
+            print(f"  ⚠️ {name} 失败: {e}")
+        if outcomes is not None:
+            outcomes.append({
+                'strategy': name,
+                'outcome': outcome,
+                'chars': len(text),
+                'elapsed_ms': (time.perf_counter() - t0) * 1000,
+            })
+        if outcome == 'ok':
+            print(f"  ✅ {name} 成功: {len(text)} 字符")
+            return text
+    return None
+
+
+def fetch_full_text(url, retry=2, outcomes=None, cache=True, offline=False, order=None):
+    """
+    多策略全文抓取：页面只下载一次，依次交给
     1. trafilatura (最干净，专门提取正文)
     2. readability (备选)
     3. beautifulsoup 暴力提取 (兜底)
+    outcomes: 可选 list，记录下载与各策略的结果（见 extract_text）
+    cache / offline: 见 download_html
+    order: 提取器顺序（见 extract_text）
     """
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-    }
-    
-    # 策略1: trafilatura - 精度最高
+    t0 = time.perf_counter()
     try:
-        downloaded = trafilatura.fetch_url(url)
-        if downloaded:
-            text = trafilatura.extract(downloaded, include_comments=False, include_tables=False)
-            if text and len(text) > 500:
-                print(f"  ✅ trafilatura 成功: {len(text)} 字符")
-                return text
+        html = download_html(url, retry=retry, cache=cache, offline=offline)
     except Exception as e:
-        print(f"  ⚠️ trafilatura 失败: {e}")
-    
-    # 策略2: readability - 通用性好
+        print(f"  ⚠️ 下载失败: {e}")
+        if outcomes is not None:
+            outcomes.append(_download_error(e, t0))
+        return None
+    return extract_text(html, outcomes=outcomes, order=order)
+
+
+def _download_error(e, t0):
+    """下载失败的结果记录；404/410 之类标记 permanent，状态机据此不再重试"""
+    status = getattr(getattr(e, 'response', None), 'status_code', None)
+    return {
+        'strategy': 'download',
+        'outcome': f"error: {str(e)[:200]}",
+        'chars': 0,
+        'elapsed_ms': (time.perf_counter() - t0) * 1000,
+        'permanent': status in PERMANENT_HTTP_STATUS or isinstance(e, NotHTML),
+    }
+
+
+def _extract_job(html, order=None):
+    """进程池里跑的提取任务：返回 (正文或 None, 各策略结果)"""
+    outcomes = []
+    return extract_text(html, outcomes=outcomes, order=order), outcomes
+
+
+def load_keep_rates(conn):
+    """
+    各源最近 KEEP_RATE_WINDOW_DAYS 天的保留率（已评分文章中 ≥ KEEP_THRESHOLD 的比例）
+    按全局保留率做平滑；返回 ({feed_name: rate}, 全局保留率)
+    """
+    rows = conn.execute('''
+        SELECT feed_name, COUNT(*), SUM(criteria_score >= ?)
+        FROM articles
+        WHERE criteria_score IS NOT NULL AND published_date >= datetime('now', ?)
+        GROUP BY feed_name
+    ''', (KEEP_THRESHOLD, f"-{KEEP_RATE_WINDOW_DAYS} days")).fetchall()
+    scored = sum(r[1] for r in rows)
+    default_rate = sum(r[2] for r in rows) / scored if scored else 0.5
+    rates = {
+        feed: (kept + KEEP_RATE_PRIOR * default_rate) / (n + KEEP_RATE_PRIOR)
+        for feed, n, kept in rows
+    }
+    return rates, default_rate
+
+
+def fulltext_priority(score, keep_rate, summary_chars, age_days):
+    """
+    全文抓取优先级（0-100），三项加权（PRIORITY_WEIGHTS）：
+    relevance  未评分：所在源的保留率（常年低于保留线的源排后面）；
+               已评分：离保留线越近越高（全文最可能翻转结论）
+    summary    摘要越短，全文带来的新信息越多；摘要超过 SUMMARY_ENOUGH_CHARS 时整体再打折
+    recency    按 RECENCY_HALF_LIFE_DAYS 半衰
+    """
+    if score is None:
+        relevance = keep_rate
+    else:
+        relevance = 1 - min(abs(score - KEEP_THRESHOLD), SCORE_MARGIN) / SCORE_MARGIN
+    summary = 1 - min(summary_chars, SUMMARY_ENOUGH_CHARS) / SUMMARY_ENOUGH_CHARS
+    recency = 0.5 ** (max(age_days or 0, 0) / RECENCY_HALF_LIFE_DAYS)
+    value = (PRIORITY_WEIGHTS['relevance'] * relevance
+             + PRIORITY_WEIGHTS['summary'] * summary
+             + PRIORITY_WEIGHTS['recency'] * recency)
+    if summary_chars > SUMMARY_ENOUGH_CHARS:
+        value *= LONG_SUMMARY_FACTOR
+    return value
+
+
+def load_routes(conn, now=None):
+    """
+    从 fulltext_strategy_log 学习每个域名的提取路由: {domain: {'order': [...], 'skip': bool, 'probe': bool}}
+    order: 按成功率、再按成功时的平均正文长度从高到低排列（样本不足的策略不参与）
+    skip: 最近试过 SKIP_MIN_ARTICLES 篇以上、一篇都没成功
+    probe: skip 的域名上次尝试已过去 SKIP_RETRY_DAYS 天，本次运行放一篇去试探（成功后 skip 自然解除）
+    """
+    extractor_names = [name for name, _ in EXTRACTORS]
+    placeholders = ','.join('?' * len(extractor_names))
+    window = (f"-{ROUTE_WINDOW_DAYS} days",)
+    stats = conn.execute(f'''
+        SELECT domain, strategy, COUNT(*) AS n,
+               SUM(outcome = 'ok') AS ok,
+               AVG(CASE WHEN outcome = 'ok' THEN chars END) AS avg_chars
+        FROM fulltext_strategy_log
+        WHERE attempted_at >= datetime('now', ?) AND strategy IN ({placeholders})
+        GROUP BY domain, strategy
+    ''', window + tuple(extractor_names)).fetchall()
+    articles = conn.execute('''
+        SELECT domain, COUNT(DISTINCT article_link) AS n,
+               COUNT(DISTINCT CASE WHEN outcome = 'ok' THEN article_link END) AS ok,
+               julianday('now') - julianday(MAX(attempted_at)) AS idle_days
+        FROM fulltext_strategy_log
+        WHERE attempted_at >= datetime('now', ?)
+        GROUP BY domain
+    ''', window).fetchall()
+
+    routes = {}
+    ranked = {}
+    for domain, strategy, n, ok, avg_chars in stats:
+        if n >= ROUTE_MIN_SAMPLES:
+            ranked.setdefault(domain, []).append((ok / n, avg_chars or 0, strategy))
+    for domain, candidates in ranked.items():
+        candidates.sort(reverse=True)
+        routes[domain] = {'order': [c[2] for c in candidates], 'skip': False, 'probe': False}
+    for domain, n, ok, idle_days in articles:
+        if n >= SKIP_MIN_ARTICLES and ok == 0:
+            route = routes.setdefault(domain, {'order': [], 'skip': False, 'probe': False})
+            route['skip'] = True
+            route['probe'] = (idle_days or 0) >= SKIP_RETRY_DAYS
+    return routes
+
+
+def route_for(routes, link):
+    """取某个链接的路由，没有历史时返回默认顺序"""
+    return routes.get(urlsplit(link).hostname or '', {'order': [], 'skip': False, 'probe': False})
+
+
+def _read_cache(article, cache, force):
+    """
+    这篇文章是否先读 html_cache：重试时（已尝试过）不读，让软付费墙、纯 JS 页、临时拦截页
+    有机会重新下载；--force 重跑仍读缓存（换提取器后重新提取用）
+    """
+    return cache and (force or not article['fulltext_attempts'])
+
+
+def _download_job(link, limiter, retry=2, cache=True, offline=False):
+    """
+    下载线程：缓存命中直接返回；要联网时才按域名取令牌再下载
+    返回 (html 或 None, 下载失败时的结果记录)
+    """
+    t0 = time.perf_counter()
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        doc = Document(response.text)
-        text = doc.summary()
-        # 清理HTML标签
-        soup = BeautifulSoup(text, 'html.parser')
-        text = soup.get_text()
-        if len(text) > 500:
-            print(f"  ✅ readability 成功: {len(text)} 字符")
-            return text
+        if cache and not offline:
+            cached = html_cache.get(link)
+            if cached is not None:
+                return cached, []
+        if not offline:
+            limiter.acquire(urlsplit(link).hostname or '')
+            t0 = time.perf_counter()
+        return download_html(link, retry=retry, cache=False, offline=offline), []
     except Exception as e:
-        print(f"  ⚠️ readability 失败: {e}")
-    
-    # 策略3: 暴力提取 - 死马当活马医
+        print(f"  ⚠️ 下载失败: {link} {e}")
+        return None, [_download_error(e, t0)]
+
+
+def record_strategy_outcomes(conn, link, outcomes):
+    """把一篇文章的各策略结果写入 fulltext_strategy_log（由调用方提交）"""
+    domain = urlsplit(link).hostname or ''
+    conn.executemany(
+        '''INSERT INTO fulltext_strategy_log
+           (article_link, domain, strategy, outcome, chars, elapsed_ms)
+           VALUES (?, ?, ?, ?, ?, ?)''',
+        [(link, domain, o['strategy'], o['outcome'], o['chars'], o['elapsed_ms']) for o in outcomes]
+    )
+
+def init_fulltext_state(conn):
+    """确保全文状态列、策略记录表存在；首次加列时按 fulltext_fetched 回填状态"""
+    for sql in _STRATEGY_LOG_SQL:
+        conn.execute(sql)
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        # 移除脚本和样式
-        for script in soup(["script", "style", "nav", "header", "footer", "aside"]):
-            script.decompose()
-        text = soup.get_text()
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = ' '.join(chunk for chunk in chunks if chunk)
-        if len(text) > 500:
-            print(f"  ✅ 暴力提取 成功: {len(text)} 字符")
-            return text[:10000]  # 截断
-    except Exception as e:
-        print(f"  ⚠️ 暴力提取 失败: {e}")
-    
-    return None
+        conn.execute('ALTER TABLE articles ADD COLUMN fulltext_status TEXT')
+        conn.execute('''
+            UPDATE articles SET fulltext_status = CASE fulltext_fetched
+                WHEN 1 THEN 'ok' WHEN -1 THEN 'failed' ELSE 'pending' END
+        ''')
+    except sqlite3.OperationalError:
+        pass  # column already exists
+    for column, decl in (('fulltext_retry_at', 'TIMESTAMP'), ('fulltext_error', 'TEXT'),
+                         ('fulltext_attempts', 'INTEGER DEFAULT 0')):
+        try:
+            conn.execute(f'ALTER TABLE articles ADD COLUMN {column} {decl}')
+        except sqlite3.OperationalError:
+            pass
+    conn.execute(
+        'CREATE INDEX IF NOT EXISTS idx_fulltext_status ON articles(fulltext_status, fulltext_retry_at)'
+    )
+    conn.commit()
+
 
-def update_articles_with_fulltext(limit=50, force=False, feed_name=None, days=None):
+def update_articles_with_fulltext(limit=50, force=False, feed_name=None, days=None,
+                                  workers=1, extract_workers=None, cache=True, offline=False):
     """
-    为content为空或太短的文章补全全文
-    force=True: 强制重新抓取
+    为还没有全文、或失败后已到重试时间的文章补全全文
+    force=True: 强制重新抓取（不看状态）
     feed_name: 仅处理指定源（精确匹配）
     days: 仅处理最近N天内的文章
+    workers: >1 时并发下载（每个域名令牌桶限速），默认 1 为逐篇串行
+    extract_workers: 并发模式下正文提取的进程数（默认 min(workers, CPU核数)，0 表示不开进程池）
+    cache: 优先用 html_cache 里的原始页面（False 时总是重新下载；失败重试的文章不读缓存，除非 force）
+    offline: 只从 html_cache 重新提取，跳过缓存里没有的文章（换提取器后回填用）
     """
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
     c = conn.cursor()
+    init_fulltext_state(conn)
+    dedup.init_dedup(conn)
+    now = datetime.now()
 
     where = ["article_link LIKE 'http%'"]
     params = []
 
     if not force:
-        where.append("(content IS NULL OR length(content) < 200 OR fulltext_fetched = 0)")
+        where.append('''(fulltext_status IS NULL OR fulltext_status = 'pending'
+              OR (fulltext_status = 'failed' AND (fulltext_retry_at IS NULL OR fulltext_retry_at <= ?)))''')
+        params.append(now)
+        # 同一重复组只抓一份全文：组内已有成功的就跳过
+        where.append('''NOT EXISTS (SELECT 1 FROM articles g
+              WHERE g.dup_group = articles.dup_group AND g.id != articles.id AND g.fulltext_status = 'ok')''')
 
     if feed_name:
         where.append("feed_name = ?")
@@ -98,57 +461,208 @@ def update_articles_with_fulltext(limit=50, force=False, feed_name=None, days=No
         where.append("published_date >= datetime('now', ?)")
         params.append(f"-{int(days)} days")
 
+    # 只取到期的，按优先级排序后取前 limit 篇，失败过的文章不会一直占名额
     sql = f'''
-        SELECT id, article_title, article_link
+        SELECT id, article_title, article_link, fulltext_attempts, dup_group,
+               feed_name, criteria_score, COALESCE(length(raw_content), 0) AS summary_chars,
+               julianday('now') - COALESCE(julianday(published_date), julianday('now')) AS age_days
         FROM articles
         WHERE {' AND '.join(where)}
-        ORDER BY published_date DESC
-        LIMIT ?
     '''
-    params.append(limit)
     c.execute(sql, params)
-    articles = c.fetchall()
+    candidates = c.fetchall()
+    keep_rates, default_rate = load_keep_rates(conn)
+    candidates.sort(key=lambda a: fulltext_priority(
+        a['criteria_score'], keep_rates.get(a['feed_name'], default_rate),
+        a['summary_chars'], a['age_days']), reverse=True)
+    # 按域名历史选提取器顺序；历来拿不到全文的域名（付费墙等）直接跳过（离线重提取不跳过）
+    # 搁置满 SKIP_RETRY_DAYS 天的域名每次运行只放优先级最高的一篇去试探，其余继续搁置
+    routes = load_routes(conn)
+    retry_at = now + timedelta(days=SKIP_RETRY_DAYS)
+    articles = []
+    groups = set()
+    skipped_domains, probed = set(), set()
+    for a in candidates:
+        if len(articles) >= limit:
+            break
+        # 一批里同组的多份副本只留优先级最高的那篇
+        group = a['dup_group'] or -a['id']
+        if not force and group in groups:
+            continue
+        # 离线模式只能重提取缓存里有的页面，先筛掉没缓存的再占 limit 名额
+        if offline and not html_cache.contains(a['article_link']):
+            continue
+        # 被搁置的域名同样在占名额之前筛掉
+        if not offline:
+            route = route_for(routes, a['article_link'])
+            domain = urlsplit(a['article_link']).hostname or ''
+            if route['skip']:
+                if not route['probe'] or domain in probed:
+                    _set_status(conn, a['id'], FT_FAILED, retry_at, '域名历来拿不到全文，暂时跳过',
+                                attempted=False)
+                    skipped_domains.add(domain)
+                    continue
+                probed.add(domain)
+        groups.add(group)
+        articles.append(a)
 
-    print(f"📄 发现 {len(articles)} 篇文章需要抓取全文")
+    if offline:
+        print(f"📦 离线模式: 发现 {len(candidates)} 篇待抓全文，按优先级取 HTML 缓存中的 {len(articles)} 篇")
+    else:
+        print(f"📄 发现 {len(candidates)} 篇待抓全文，按优先级取 {len(articles)} 篇")
+    if skipped_domains:
+        conn.commit()
+        print(f"🚧 跳过历来拿不到全文的域名: {', '.join(sorted(skipped_domains))}")
+    if probed:
+        print(f"🔍 试探已搁置 {SKIP_RETRY_DAYS} 天以上的域名（各放一篇）: {', '.join(sorted(probed))}")
 
-    success_count = 0
-    for article in articles:
-        title = article['article_title'] or ''
-        link = article['article_link']
-        article_id = article['id']
-        print(f"  抓取: {title[:50]}...")
-        print(f"  链接: {link}")
-
-        full_text = fetch_full_text(link)
-
-        if full_text:
-            c.execute(
-                "UPDATE articles SET content = ?, fulltext_fetched = 1 WHERE id = ?",
-                (full_text, article_id)
-            )
-            conn.commit()
-            success_count += 1
-            print(f"  ✅ 成功: {len(full_text)} 字符")
-        else:
-            c.execute(
-                "UPDATE articles SET fulltext_fetched = 0 WHERE id = ?",
-                (article_id,)
-            )
+    if not articles:
+        conn.close()
+        return 0
+
+    if workers and workers > 1:
+        success_count = _update_concurrent(conn, articles, workers, extract_workers,
+                                           cache=cache, offline=offline, routes=routes, force=force)
+    else:
+        success_count = 0
+        for article in articles:
+            title = article['article_title'] or ''
+            link = article['article_link']
+            print(f"  抓取: {title[:50]}...")
+            print(f"  链接: {link}")
+
+            outcomes = []
+            full_text = fetch_full_text(link, outcomes=outcomes, cache=_read_cache(article, cache, force),
+                                        offline=offline,
+                                        order=route_for(routes, link)['order'])
+            success_count += _save_result(conn, article, full_text, outcomes)
             conn.commit()
-            print(f"  ❌ 失败: 无法抓取全文")
 
-        time.sleep(1)  # 礼貌性延迟
+            if not offline:
+                time.sleep(1)  # 礼貌性延迟
 
     conn.close()
     print(f"✅ 全文抓取完成: {success_count}/{len(articles)} 成功")
     return success_count
 
+
+def _set_status(conn, article_id, status, retry_at=None, error=None, attempted=True):
+    """推进全文状态；attempted=False（如按域名跳过）时不计入尝试次数"""
+    conn.execute(
+        '''UPDATE articles SET fulltext_status = ?, fulltext_retry_at = ?, fulltext_error = ?,
+               fulltext_fetched = ?, fulltext_attempts = COALESCE(fulltext_attempts, 0) + ?
+           WHERE id = ?''',
+        (status, retry_at, error, 1 if status == FT_OK else 0, 1 if attempted else 0, article_id)
+    )
+
+
+def retry_delay(attempts):
+    """第 attempts 次失败后的重试间隔：RETRY_BASE_HOURS 起每次翻倍，不超过 RETRY_MAX_HOURS"""
+    hours = RETRY_BASE_HOURS * (2 ** max(0, attempts - 1))
+    return timedelta(hours=min(hours, RETRY_MAX_HOURS))
+
+
+def _save_result(conn, article, full_text, outcomes, now=None):
+    """写入一篇文章的抓取结果并推进状态（不提交）；成功返回 1，失败返回 0"""
+    record_strategy_outcomes(conn, article['article_link'], outcomes)
+    title = (article['article_title'] or '')[:40]
+    if full_text:
+        article_bodies.save_content(conn, article['id'], full_text[:CONTENT_MAX_CHARS])
+        _set_status(conn, article['id'], FT_OK)
+        print(f"  ✅ 成功: {len(full_text)} 字符 | {title}")
+        return 1
+    error = f"{outcomes[-1]['strategy']}: {outcomes[-1]['outcome']}" if outcomes else '无法抓取全文'
+    attempts = (article['fulltext_attempts'] or 0) + 1
+    if any(o.get('permanent') for o in outcomes) or attempts >= MAX_ATTEMPTS:
+        _set_status(conn, article['id'], FT_PERMANENT, None, error)
+        print(f"  ⛔ 永久失败（第 {attempts} 次）: {error[:60]} | {title}")
+    else:
+        delay = retry_delay(attempts)
+        _set_status(conn, article['id'], FT_FAILED, (now or datetime.now()) + delay, error)
+        print(f"  ❌ 失败（第 {attempts} 次，{delay.total_seconds() / 3600:g} 小时后重试）: 无法抓取全文 | {title}")
+    return 0
+
+
+def _update_concurrent(conn, articles, workers, extract_workers=None, cache=True, offline=False,
+                       routes=None, force=False):
+    """
+    并发模式：线程池下载（每个域名各自令牌桶限速），进程池做 CPU 密集的正文提取，
+    主线程收结果并按 COMMIT_BATCH 批量提交
+    extract_workers=0 时在下载线程里直接提取，不开进程池
+    """
+    limiter = KeyedRateLimiter(DOMAIN_RATE, DOMAIN_BURST)
+    if extract_workers is None:
+        extract_workers = min(workers, os.cpu_count() or 1)
+    print(f"⚡ 并发全文抓取: 下载 {workers} 线程，提取 {extract_workers or '同线程'} 进程，"
+          f"每域名 {DOMAIN_RATE:g} 次/秒")
+
+    success_count = 0
+    unsaved = 0
+    t0 = time.perf_counter()
+    dl_pool = ThreadPoolExecutor(max_workers=workers)
+    # spawn: 下载线程已在运行，fork 出来的子进程可能继承被占用的锁
+    ex_pool = ProcessPoolExecutor(
+        max_workers=extract_workers, mp_context=multiprocessing.get_context('spawn')
+    ) if extract_workers else None
+    try:
+        downloads = {
+            dl_pool.submit(_download_job, a['article_link'], limiter, 2,
+                           _read_cache(a, cache, force), offline): a
+            for a in articles
+        }
+        extractions = {}
+        pending = set(downloads)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                if fut in downloads:
+                    article = downloads.pop(fut)
+                    html, outcomes = fut.result()
+                    if html is not None:
+                        order = route_for(routes or {}, article['article_link'])['order']
+                        if ex_pool is not None:
+                            job = ex_pool.submit(_extract_job, html, order)
+                        else:
+                            job = dl_pool.submit(_extract_job, html, order)
+                        extractions[job] = article
+                        pending.add(job)
+                        continue
+                    full_text = None
+                else:
+                    article = extractions.pop(fut)
+                    try:
+                        full_text, outcomes = fut.result()
+                    except Exception as e:
+                        print(f"  ⚠️ 提取进程出错: {e}")
+                        full_text, outcomes = None, []
+                success_count += _save_result(conn, article, full_text, outcomes)
+                unsaved += 1
+                if unsaved >= COMMIT_BATCH:
+                    conn.commit()
+                    unsaved = 0
+        conn.commit()
+    finally:
+        dl_pool.shutdown(wait=True)
+        if ex_pool is not None:
+            ex_pool.shutdown(wait=True)
+
+    elapsed = time.perf_counter() - t0
+    print(f"⏱️ 并发抓取 {len(articles)} 篇用时 {elapsed:.1f}s")
+    return success_count
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="全文抓取工具")
     parser.add_argument("--limit", type=int, default=20, help="最多处理多少篇")
     parser.add_argument("--force", action="store_true", help="强制重抓")
     parser.add_argument("--feed", type=str, default=None, help="仅处理指定源名称")
     parser.add_argument("--days", type=int, default=None, help="仅处理最近N天")
+    parser.add_argument("--workers", type=int, nargs="?", const=FULLTEXT_WORKERS, default=1,
+                        help=f"并发下载线程数（只写 --workers 为 {FULLTEXT_WORKERS}，默认串行）")
+    parser.add_argument("--extract-workers", type=int, default=None,
+                        help="正文提取进程数（默认 min(workers, CPU核数)，0 表示不开进程池）")
+    parser.add_argument("--no-cache", action="store_true", help="不读 HTML 缓存，总是重新下载")
+    parser.add_argument("--offline", action="store_true",
+                        help="只从 HTML 缓存重新提取，不联网（配合 --force 回填）")
     args = parser.parse_args()
 
     update_articles_with_fulltext(
@@ -156,4 +670,8 @@ if __name__ == '__main__':
         force=args.force,
         feed_name=args.feed,
         days=args.days,
+        workers=args.workers,
+        extract_workers=args.extract_workers,
+        cache=not args.no_cache,
+        offline=args.offline,
     )
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+原始 HTML 磁盘缓存 - 全文抓取下载过的页面按内容寻址、压缩存盘
+换提取器或 --force 重跑时直接从缓存重新提取，不再重复请求发布方
+
+布局：
+    data/html_cache/index.db        URL（规范化后）→ 内容哈希、大小、最近访问时间
+    data/html_cache/blobs/ab/<sha256>.zz   zlib 压缩的原始字节，同内容多 URL 共用一份
+总大小超过 HTML_CACHE_MAX_BYTES 时按最近访问时间（LRU）淘汰
+
+用法:
+    python html_cache.py            # 查看缓存统计
+    python html_cache.py --evict    # 立即按上限淘汰
+    python html_cache.py --clear    # 清空缓存
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import zlib
+
+from url_canon import canonical_url
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), 'data', 'html_cache')
+HTML_CACHE_MAX_BYTES = 512 * 1024 * 1024   # 压缩后总大小上限
+EVICT_TO_FRACTION = 0.9                    # 淘汰到上限的 90%，避免每次写入都触发
+COMPRESS_LEVEL = 6
+
+_INDEX_SQL = '''
+    CREATE TABLE IF NOT EXISTS cache_entries (
+        url_key TEXT PRIMARY KEY,
+        url TEXT,
+        blob TEXT,
+        stored_bytes INTEGER,
+        raw_bytes INTEGER,
+        fetched_at REAL,
+        last_access REAL
+    )
+'''
+_INDEX_IDX_SQL = [
+    'CREATE INDEX IF NOT EXISTS idx_cache_access ON cache_entries(last_access)',
+    'CREATE INDEX IF NOT EXISTS idx_cache_blob ON cache_entries(blob)',
+]
+
+# 缓存索引单独一个库：并发下载线程写缓存时不和主库的批量提交抢锁
+# _lock 只保护索引读写（和淘汰时删文件）；压缩/解压、读写内容文件都在锁外
+_lock = threading.Lock()
+
+
+def _index_path():
+    return os.path.join(CACHE_DIR, 'index.db')
+
+
+def _blob_path(digest):
+    return os.path.join(CACHE_DIR, 'blobs', digest[:2], digest + '.zz')
+
+
+def _connect():
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    conn = sqlite3.connect(_index_path(), timeout=30)
+    conn.execute(_INDEX_SQL)
+    for sql in _INDEX_IDX_SQL:
+        conn.execute(sql)
+    return conn
+
+
+def get(url):
+    """读取缓存的原始字节；未命中返回 None（命中时刷新最近访问时间）"""
+    key = canonical_url(url)
+    with _lock:
+        conn = _connect()
+        try:
+            row = conn.execute(
+                'SELECT blob FROM cache_entries WHERE url_key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                'UPDATE cache_entries SET last_access = ? WHERE url_key = ?', (time.time(), key)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    # 读文件和解压不持锁，并发的下载/提取线程只在索引读写上排队
+    digest = row[0]
+    try:
+        with open(_blob_path(digest), 'rb') as f:
+            return zlib.decompress(f.read())
+    except (OSError, zlib.error):
+        # 文件丢了或损坏（也可能刚被淘汰）：删掉引用它的索引和坏文件，当作未命中，下次 put 重写
+        with _lock:
+            conn = _connect()
+            try:
+                conn.execute('DELETE FROM cache_entries WHERE blob = ?', (digest,))
+                conn.commit()
+                _drop_blob_if_unused(conn, digest)
+            finally:
+                conn.close()
+        return None
+
+
+def contains(url):
+    """缓存里是否有这个 URL（不刷新访问时间）"""
+    with _lock:
+        conn = _connect()
+        try:
+            return conn.execute(
+                'SELECT 1 FROM cache_entries WHERE url_key = ?', (canonical_url(url),)
+            ).fetchone() is not None
+        finally:
+            conn.close()
+
+
+def _write_blob(path, compressed):
+    """原子写入内容文件（按内容寻址，并发写同一份内容结果相同）"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(compressed)
+    os.replace(tmp, path)
+
+
+def put(url, data, max_bytes=HTML_CACHE_MAX_BYTES):
+    """写入原始字节（内容相同的页面只存一份），超过上限时按 LRU 淘汰"""
+    key = canonical_url(url)
+    digest = hashlib.sha256(data).hexdigest()
+    path = _blob_path(digest)
+    # 压缩和写文件在锁外做，锁只保护索引
+    compressed = None
+    if not os.path.exists(path):
+        compressed = zlib.compress(data, COMPRESS_LEVEL)
+        _write_blob(path, compressed)
+    try:
+        stored = os.path.getsize(path)
+    except OSError:
+        compressed = compressed or zlib.compress(data, COMPRESS_LEVEL)
+        stored = len(compressed)
+    now = time.time()
+    with _lock:
+        conn = _connect()
+        try:
+            old = conn.execute('SELECT blob FROM cache_entries WHERE url_key = ?', (key,)).fetchone()
+            conn.execute('''
+                INSERT INTO cache_entries (url_key, url, blob, stored_bytes, raw_bytes, fetched_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url_key) DO UPDATE SET
+                    url = excluded.url,
+                    blob = excluded.blob,
+                    stored_bytes = excluded.stored_bytes,
+                    raw_bytes = excluded.raw_bytes,
+                    fetched_at = excluded.fetched_at,
+                    last_access = excluded.last_access
+            ''', (key, url, digest, stored, len(data), now, now))
+            if old and old[0] != digest:
+                _drop_blob_if_unused(conn, old[0])
+            conn.commit()
+            # 写完文件到登记索引之间，同一份内容可能刚被别的线程淘汰删掉：补写（少见）
+            if not os.path.exists(path):
+                _write_blob(path, compressed or zlib.compress(data, COMPRESS_LEVEL))
+            if max_bytes and _total_bytes(conn) > max_bytes:
+                _evict(conn, int(max_bytes * EVICT_TO_FRACTION))
+        finally:
+            conn.close()
+
+
+def _total_bytes(conn):
+    row = conn.execute('''
+        SELECT COALESCE(SUM(stored_bytes), 0) FROM
+        (SELECT MAX(stored_bytes) AS stored_bytes FROM cache_entries GROUP BY blob)
+    ''').fetchone()
+    return row[0]
+
+
+def _drop_blob_if_unused(conn, digest):
+    """没有任何 URL 再引用这个内容时删掉文件，返回释放的字节数"""
+    if conn.execute('SELECT 1 FROM cache_entries WHERE blob = ? LIMIT 1', (digest,)).fetchone():
+        return 0
+    path = _blob_path(digest)
+    try:
+        size = os.path.getsize(path)
+        os.remove(path)
+        return size
+    except OSError:
+        return 0
+
+
+def _evict(conn, target_bytes):
+    """按最近访问时间从旧到新删除，直到总大小不超过 target_bytes；返回删除的条目数"""
+    total = _total_bytes(conn)
+    removed = 0
+    rows = conn.execute(
+        'SELECT url_key, blob FROM cache_entries ORDER BY last_access ASC'
+    ).fetchall()
+    for key, digest in rows:
+        if total <= target_bytes:
+            break
+        conn.execute('DELETE FROM cache_entries WHERE url_key = ?', (key,))
+        total -= _drop_blob_if_unused(conn, digest)
+        removed += 1
+    conn.commit()
+    return removed
+
+
+def evict(max_bytes=HTML_CACHE_MAX_BYTES):
+    """按上限立即淘汰，返回删除的条目数"""
+    with _lock:
+        conn = _connect()
+        try:
+            return _evict(conn, max_bytes)
+        finally:
+            conn.close()
+
+
+def stats():
+    """缓存统计: entries / blobs / stored_bytes / raw_bytes"""
+    with _lock:
+        conn = _connect()
+        try:
+            entries, raw = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(raw_bytes), 0) FROM cache_entries'
+            ).fetchone()
+            blobs = conn.execute('SELECT COUNT(DISTINCT blob) FROM cache_entries').fetchone()[0]
+            return {
+                'entries': entries,
+                'blobs': blobs,
+                'stored_bytes': _total_bytes(conn),
+                'raw_bytes': raw,
+            }
+        finally:
+            conn.close()
+
+
+def clear():
+    """删除整个缓存目录"""
+    with _lock:
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="原始 HTML 缓存")
+    parser.add_argument("--evict", action="store_true", help="立即按上限淘汰")
+    parser.add_argument("--clear", action="store_true", help="清空缓存")
+    args = parser.parse_args()
+
+    if args.clear:
+        clear()
+        print("🧹 已清空 HTML 缓存")
+    else:
+        if args.evict:
+            print(f"🧹 淘汰了 {evict()} 条")
+        s = stats()
+        ratio = s['raw_bytes'] / s['stored_bytes'] if s['stored_bytes'] else 0
+        print(f"📦 HTML 缓存: {s['entries']} 个 URL / {s['blobs']} 份内容，"
+              f"占用 {s['stored_bytes'] / 1e6:.1f}MB（原始 {s['raw_bytes'] / 1e6:.1f}MB，压缩比 {ratio:.1f}x），"
+              f"上限 {HTML_CACHE_MAX_BYTES / 1e6:.0f}MB")
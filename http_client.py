@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+共享 HTTP 客户端 - 所有联网抓取统一走这里
+按主机复用 keep-alive 连接池（RSSHub 一个主机挂了很多源，收益最大），
+统一 UA / 超时 / 压缩协商，并对响应体大小设上限
+"""
+
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36'
+DEFAULT_TIMEOUT = (10, 30)          # (连接, 读取) 秒
+MAX_BODY_BYTES = 20 * 1024 * 1024   # 默认响应体上限（按解压后字节计）
+POOL_CONNECTIONS = 32               # 缓存多少个主机的连接池
+POOL_MAXSIZE = 8                    # 每个主机保持的最大连接数
+CHUNK_SIZE = 64 * 1024
+
+# urllib3 只有装了 brotli 才能解 br，没装就不要声明支持
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+
+class ResponseTooLarge(requests.exceptions.RequestException):
+    """响应体超过 max_bytes 上限"""
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _build_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({
+        'User-Agent': USER_AGENT,
+        'Accept-Encoding': ACCEPT_ENCODING,
+        'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+        'Connection': 'keep-alive',
+    })
+    # 可选：录制/回放模式（见 http_fixtures.py）
+    import http_fixtures
+    http_fixtures.install_from_env(session)
+    return session
+
+
+def get_session():
+    """进程内共享的 Session（线程安全地懒加载）"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def read_capped(response, max_bytes=MAX_BODY_BYTES):
+    """
+    边下边计数地读完响应体，超过 max_bytes 立即中断并抛 ResponseTooLarge
+    按解压后的字节计，顺带防住压缩炸弹
+    """
+    length = response.headers.get('Content-Length')
+    if max_bytes and length and length.isdigit() and int(length) > max_bytes:
+        raise ResponseTooLarge(f"Content-Length {length} > {max_bytes}")
+    chunks = []
+    size = 0
+    for chunk in response.iter_content(CHUNK_SIZE):
+        size += len(chunk)
+        if max_bytes and size > max_bytes:
+            raise ResponseTooLarge(f"body exceeds {max_bytes} bytes")
+        chunks.append(chunk)
+    return b''.join(chunks)
+
+
+def read_prefix(response, max_bytes):
+    """
+    最多读 max_bytes 字节就停（不抛异常），返回 (body, truncated)
+    用于只需要页面前一部分的场景：读满后不再下载剩余部分，调用方随后 close() 断开连接
+    """
+    chunks = []
+    size = 0
+    for chunk in response.iter_content(CHUNK_SIZE):
+        if size + len(chunk) > max_bytes:
+            chunks.append(chunk[:max_bytes - size])
+            return b''.join(chunks), True
+        chunks.append(chunk)
+        size += len(chunk)
+    return b''.join(chunks), False
+
+
+def get(url, headers=None, timeout=DEFAULT_TIMEOUT, max_bytes=MAX_BODY_BYTES, stream=False, **kwargs):
+    """
+    GET 请求（走共享连接池）
+
+    stream=False: 读完响应体（受 max_bytes 限制）后返回，response.content / .text 可直接用
+    stream=True: 返回未读取的流式响应，调用方自行读取并负责 close()
+    headers 会与默认请求头合并，同名时以调用方为准
+    """
+    response = get_session().get(url, headers=headers, timeout=timeout, stream=True, **kwargs)
+    if stream:
+        return response
+    try:
+        response._content = read_capped(response, max_bytes)
+    finally:
+        response.close()
+    return response
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+HTTP 录制/回放 - 给抓取层做可复现的离线测试与基准
+录制：真实请求的状态码、响应头、正文按 URL 存成 gzip 压缩的 JSON
+回放：从录制目录直接返回响应，可模拟网络延迟
+
+用法（环境变量，对所有走 http_client 的模块生效）:
+    AI_RSS_HTTP_MODE=record AI_RSS_FIXTURE_DIR=fixtures/feeds python fetcher.py
+    AI_RSS_HTTP_MODE=replay AI_RSS_FIXTURE_DIR=fixtures/feeds AI_RSS_REPLAY_LATENCY=0.2 python fetcher.py
+"""
+
+import base64
+import gzip
+import hashlib
+import json
+import os
+import random
+import time
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# 正文已解压保存，这些头回放时不能再带
+_DROP_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}
+
+
+def fixture_path(fixture_dir, url):
+    return os.path.join(fixture_dir, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.json.gz')
+
+
+def save_fixture(fixture_dir, url, status, headers, body):
+    os.makedirs(fixture_dir, exist_ok=True)
+    record = {
+        'url': url,
+        'status': status,
+        'headers': {k: v for k, v in headers.items() if k.lower() not in _DROP_HEADERS},
+        'body': base64.b64encode(body).decode('ascii'),
+        'recorded_at': time.time(),
+    }
+    with gzip.open(fixture_path(fixture_dir, url), 'wt', encoding='utf-8') as f:
+        json.dump(record, f)
+
+
+def load_fixture(fixture_dir, url):
+    path = fixture_path(fixture_dir, url)
+    if not os.path.exists(path):
+        return None
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        record = json.load(f)
+    record['body'] = base64.b64decode(record['body'])
+    return record
+
+
+def list_fixture_urls(fixture_dir):
+    """录制目录里有哪些 URL"""
+    urls = []
+    if not os.path.isdir(fixture_dir):
+        return urls
+    for name in sorted(os.listdir(fixture_dir)):
+        if name.endswith('.json.gz'):
+            with gzip.open(os.path.join(fixture_dir, name), 'rt', encoding='utf-8') as f:
+                urls.append(json.load(f)['url'])
+    return urls
+
+
+class RecordingAdapter(HTTPAdapter):
+    """照常发请求，同时把最终响应写入录制目录"""
+
+    def __init__(self, fixture_dir, **kwargs):
+        super().__init__(**kwargs)
+        self.fixture_dir = fixture_dir
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        if response.status_code == 304:
+            return response  # 不要用空的 304 覆盖已录制的正文
+        # 读完正文后 iter_content 会改为遍历已缓存的内容，调用方无感知
+        body = response.content
+        save_fixture(self.fixture_dir, request.url, response.status_code, response.headers, body)
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    从录制目录回放响应，不联网
+    latency: 每次请求固定等待的秒数；jitter: 额外的随机等待上限
+    录制的 ETag / Last-Modified 与条件请求头匹配时回 304
+    """
+
+    def __init__(self, fixture_dir, latency=0.0, jitter=0.0):
+        super().__init__()
+        self.fixture_dir = fixture_dir
+        self.latency = latency
+        self.jitter = jitter
+
+    def send(self, request, **kwargs):
+        record = load_fixture(self.fixture_dir, request.url)
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+        if record is None:
+            raise requests.exceptions.ConnectionError(f"no fixture for {request.url}", request=request)
+
+        headers = CaseInsensitiveDict(record['headers'])
+        status = record['status']
+        body = record['body']
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if (etag and request.headers.get('If-None-Match') == etag) or (
+                last_modified and request.headers.get('If-Modified-Since') == last_modified):
+            status, body = 304, b''
+
+        response = requests.Response()
+        response.status_code = status
+        response.headers = headers
+        response.encoding = get_encoding_from_headers(headers)
+        response._content = body
+        response._content_consumed = True
+        response.url = request.url
+        response.request = request
+        response.reason = 'Not Modified' if status == 304 else 'Replayed'
+        return response
+
+    def close(self):
+        pass
+
+
+def install(session, mode, fixture_dir, latency=0.0, jitter=0.0):
+    """在 Session 上挂载录制/回放适配器"""
+    if mode == 'record':
+        adapter = RecordingAdapter(fixture_dir)
+    elif mode == 'replay':
+        adapter = ReplayAdapter(fixture_dir, latency=latency, jitter=jitter)
+    else:
+        raise ValueError(f"unknown fixture mode: {mode}")
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return adapter
+
+
+def install_from_env(session):
+    """按 AI_RSS_HTTP_MODE / AI_RSS_FIXTURE_DIR / AI_RSS_REPLAY_LATENCY 挂载适配器"""
+    mode = os.getenv('AI_RSS_HTTP_MODE', '').strip().lower()
+    if not mode:
+        return None
+    fixture_dir = os.getenv('AI_RSS_FIXTURE_DIR', os.path.join(os.path.dirname(__file__), 'fixtures', 'http'))
+    latency = float(os.getenv('AI_RSS_REPLAY_LATENCY', '0') or 0)
+    return install(session, mode, fixture_dir, latency=latency)
@@ -16,10 +16,14 @@ import re
 import json
 import time
 import sqlite3
-import requests
 from dotenv import load_dotenv
 from openai import OpenAI
 
+import article_bodies
+import http_client
+import llm_cache
+from article_bodies import BODY_JOIN, CONTENT_SQL
+
 _env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
 load_dotenv(_env_path, override=True)
 
@@ -91,7 +95,7 @@ def _get_github_stars(repo: str) -> int:
     if token:
         headers["Authorization"] = f"Bearer {token}"
     try:
-        r = requests.get(f"https://api.github.com/repos/{repo}", headers=headers, timeout=10)
+        r = http_client.get(f"https://api.github.com/repos/{repo}", headers=headers, timeout=10)
         if r.status_code == 200:
             return r.json().get("stargazers_count", 0)
     except Exception:
@@ -99,13 +103,26 @@ def _get_github_stars(repo: str) -> int:
     return 0
 
 
+def _strip_fences(content: str) -> str:
+    raw = content.strip()
+    raw = re.sub(r'^```(?:json)?\s*', '', raw)
+    raw = re.sub(r'\s*```$', '', raw)
+    return raw
+
+
+def _is_json_object(content: str) -> bool:
+    """Only cache replies both callers can use: a (fence-stripped) JSON object."""
+    return bool(content) and isinstance(json.loads(_strip_fences(content)), dict)
+
+
 def _call_llm(prompt: str, max_tokens: int = 512, _retry: bool = True) -> str:
-    response = client.chat.completions.create(
+    content = llm_cache.complete(
+        client,
+        validate=_is_json_object,
         model=MODEL,
         max_tokens=max_tokens,
         messages=[{"role": "user", "content": prompt}],
     )
-    content = response.choices[0].message.content
     if not content:
         # DeepSeek occasionally returns None/empty on content-sensitive titles.
         # Retry once with a stripped-down prompt (title + source only).
@@ -113,10 +130,7 @@ def _call_llm(prompt: str, max_tokens: int = 512, _retry: bool = True) -> str:
             short = prompt[-800:] if len(prompt) > 800 else prompt
             return _call_llm(short, max_tokens=max_tokens, _retry=False)
         return ''
-    raw = content.strip()
-    raw = re.sub(r'^```(?:json)?\s*', '', raw)
-    raw = re.sub(r'\s*```$', '', raw)
-    return raw
+    return _strip_fences(content)
 
 
 # ── Semantic embedding model (lazy-loaded) ──────────────────────────────────
@@ -489,10 +503,11 @@ def score_unscored_jd_articles(limit: int = 200):
 
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
+    article_bodies.register(conn)
     c = conn.cursor()
-    c.execute("""
-        SELECT id, feed_name, article_title, raw_content, content, published_date
-        FROM articles
+    c.execute(f"""
+        SELECT id, feed_name, article_title, raw_content, {CONTENT_SQL} AS content, published_date
+        FROM articles {BODY_JOIN}
         WHERE feed_name LIKE 'jd-%' AND criteria_score IS NULL
         ORDER BY published_date DESC LIMIT ?
     """, (limit,))
@@ -638,16 +653,22 @@ def classify_domain(title: str, summary: str) -> str | None:
     prompt = DOMAIN_CLASSIFY_PROMPT.format(
         title=title, summary=(summary or "")[:500]
     )
+    params = dict(
+        model=MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0,
+        max_tokens=30,
+    )
     try:
-        resp = client.chat.completions.create(
-            model=MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0,
-            max_tokens=30,
-        )
-        raw = resp.choices[0].message.content.strip()
-        data = json.loads(re.search(r'\{.*\}', raw, re.S).group())
+        raw = llm_cache.get(params)
+        cached = raw is not None
+        if not cached:
+            resp = client.chat.completions.create(**params)
+            raw = resp.choices[0].message.content
+        data = json.loads(re.search(r'\{.*\}', raw.strip(), re.S).group())
         d = data.get("domain")
+        if not cached:
+            llm_cache.put(params, raw)
         return d if d in _VALID_DOMAINS else None
     except Exception:
         return None
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+学习上下文 - 读取 ~/Agents/knowledge_log/concepts.json，供评分/综述提示词注入“我正在学习的领域”
+文件只在修改时间或大小变化时重新解析；由它拼出的提示词片段按文件版本缓存，
+一次评分运行里几百篇文章共用同一份片段（并发评分线程共享，加锁）
+
+用法:
+    import knowledge_context
+    section = knowledge_context.fragment('judge', lambda concepts: ...)   # 按需拼片段，文件不变就复用
+    knowledge_context.concept_lines(keywords=True)                        # "[领域] 概念: 关键词" 多行文本
+    knowledge_context.format_concepts(concepts, keywords=True)            # build 里格式化同样的多行文本
+
+    python knowledge_context.py    # 查看当前加载的概念
+"""
+
+import json
+import os
+import threading
+
+KNOWLEDGE_LOG_PATH = os.path.expanduser('~/Agents/knowledge_log/concepts.json')
+
+
+def format_concepts(concepts, keywords=False):
+    """每个概念一行："[领域] 概念" 或 "[领域] 概念: 关键词1, 关键词2" """
+    return '\n'.join(
+        f"[{c.get('domain', '')}] {c['concept']}" +
+        (f": {', '.join(c.get('keywords', []))}" if keywords else '')
+        for c in concepts
+    )
+
+
+class KnowledgeContext:
+    """按 (mtime, size) 缓存的 concepts.json 读取器；文件缺失或损坏时视为没有概念"""
+
+    def __init__(self, path=KNOWLEDGE_LOG_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._stamp = None
+        self._concepts = []
+        self._fragments = {}
+
+    def _refresh(self):
+        """文件有变化时重新解析并清空片段缓存（调用方持锁）"""
+        try:
+            st = os.stat(self.path)
+            stamp = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamp = None
+        if self._loaded and stamp == self._stamp:
+            return
+        concepts = []
+        if stamp is not None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    concepts = [c for c in json.load(f).get('concepts', [])
+                                if isinstance(c, dict) and c.get('concept')]
+            except (OSError, ValueError, AttributeError):
+                concepts = []
+        self._loaded = True
+        self._stamp = stamp
+        self._concepts = concepts
+        self._fragments = {}
+
+    def concepts(self):
+        with self._lock:
+            self._refresh()
+            return list(self._concepts)
+
+    def fragment(self, key, build):
+        """
+        取提示词片段：build(concepts) 的结果按 key 缓存到文件下次变化为止
+        没有概念时不调用 build，直接返回空串；build 在锁内执行，只能用传进来的 concepts
+        """
+        with self._lock:
+            self._refresh()
+            if key not in self._fragments:
+                self._fragments[key] = build(list(self._concepts)) if self._concepts else ''
+            return self._fragments[key]
+
+    def concept_lines(self, keywords=False):
+        return self.fragment(('lines', keywords), lambda concepts: format_concepts(concepts, keywords))
+
+
+_default = KnowledgeContext()
+
+
+def concepts():
+    return _default.concepts()
+
+
+def fragment(key, build):
+    return _default.fragment(key, build)
+
+
+def concept_lines(keywords=False):
+    return _default.concept_lines(keywords=keywords)
+
+
+if __name__ == '__main__':
+    items = concepts()
+    print(f"📚 {KNOWLEDGE_LOG_PATH}: {len(items)} 个概念")
+    if items:
+        print(concept_lines(keywords=True))
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+LLM 响应缓存 - 按 (model, messages, temperature, max_tokens 及其余请求参数) 的哈希持久化模型输出
+重置评分、重新打标签之类的重跑遇到一模一样的提示词时直接用缓存，不再重复付费
+
+存储在 data/llm_cache.db（独立于主库，并发评分线程写缓存时不和主库抢锁）
+条目超过 LLM_CACHE_TTL_DAYS 天视为过期；总大小超过 LLM_CACHE_MAX_BYTES 时按最近访问时间（LRU）淘汰
+需要新结果时设置环境变量 LLM_CACHE_BYPASS=1（或调用时传 bypass=True）：不读缓存，新结果照常写回
+
+用法:
+    python llm_cache.py            # 查看缓存统计
+    python llm_cache.py --evict    # 立即清理过期条目并按上限淘汰
+    python llm_cache.py --clear    # 清空缓存
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+CACHE_PATH = os.path.join(os.path.dirname(__file__), 'data', 'llm_cache.db')
+LLM_CACHE_TTL_DAYS = 30
+LLM_CACHE_MAX_BYTES = 200 * 1024 * 1024
+EVICT_TO_FRACTION = 0.9
+BYPASS = os.getenv('LLM_CACHE_BYPASS', '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+_CACHE_SQL = '''
+    CREATE TABLE IF NOT EXISTS llm_responses (
+        key TEXT PRIMARY KEY,
+        model TEXT,
+        content TEXT,
+        total_tokens INTEGER,
+        bytes INTEGER,
+        created_at REAL,
+        last_access REAL
+    )
+'''
+_CACHE_IDX_SQL = 'CREATE INDEX IF NOT EXISTS idx_llm_access ON llm_responses(last_access)'
+
+_lock = threading.Lock()
+
+
+def _connect():
+    os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+    conn = sqlite3.connect(CACHE_PATH, timeout=30)
+    conn.execute(_CACHE_SQL)
+    conn.execute(_CACHE_IDX_SQL)
+    return conn
+
+
+def cache_key(params):
+    """请求参数的稳定哈希（参数顺序、messages 内字段顺序不影响结果）"""
+    blob = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+
+def get(params, bypass=None):
+    """命中且未过期时返回缓存的输出文本，否则返回 None"""
+    if BYPASS if bypass is None else bypass:
+        return None
+    key = cache_key(params)
+    now = time.time()
+    with _lock:
+        conn = _connect()
+        try:
+            row = conn.execute(
+                'SELECT content, created_at FROM llm_responses WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > LLM_CACHE_TTL_DAYS * 86400:
+                conn.execute('DELETE FROM llm_responses WHERE key = ?', (key,))
+                conn.commit()
+                return None
+            conn.execute('UPDATE llm_responses SET last_access = ? WHERE key = ?', (now, key))
+            conn.commit()
+            return row[0]
+        finally:
+            conn.close()
+
+
+def put(params, content, total_tokens=None, max_bytes=LLM_CACHE_MAX_BYTES):
+    """写入一次调用的输出（空输出不缓存），超过上限时淘汰"""
+    if not content:
+        return
+    key = cache_key(params)
+    now = time.time()
+    size = len(content.encode('utf-8'))
+    with _lock:
+        conn = _connect()
+        try:
+            conn.execute('''
+                INSERT OR REPLACE INTO llm_responses
+                (key, model, content, total_tokens, bytes, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (key, params.get('model'), content, total_tokens, size, now, now))
+            conn.commit()
+            if max_bytes and _total_bytes(conn) > max_bytes:
+                _evict(conn, int(max_bytes * EVICT_TO_FRACTION))
+        finally:
+            conn.close()
+
+
+def complete(client, bypass=None, validate=None, **params):
+    """
+    带缓存的 client.chat.completions.create，返回输出文本
+    validate: 可选，validate(content) 为真（且不抛异常）时才写缓存，
+              截断/格式不对的输出照常返回给调用方，但不会被钉在缓存里
+    """
+    content = get(params, bypass=bypass)
+    if content is not None:
+        return content
+    response = client.chat.completions.create(**params)
+    content = response.choices[0].message.content
+    if validate is not None:
+        try:
+            valid = validate(content)
+        except Exception:
+            valid = False
+        if not valid:
+            return content
+    usage = getattr(response, 'usage', None)
+    put(params, content, getattr(usage, 'total_tokens', None))
+    return content
+
+
+def _total_bytes(conn):
+    return conn.execute('SELECT COALESCE(SUM(bytes), 0) FROM llm_responses').fetchone()[0]
+
+
+def _evict(conn, target_bytes):
+    """先删过期条目，再按最近访问时间从旧到新删到 target_bytes 以下；返回删除条数"""
+    removed = conn.execute(
+        'DELETE FROM llm_responses WHERE created_at < ?', (time.time() - LLM_CACHE_TTL_DAYS * 86400,)
+    ).rowcount
+    total = _total_bytes(conn)
+    if total > target_bytes:
+        for key, size in conn.execute(
+            'SELECT key, bytes FROM llm_responses ORDER BY last_access ASC'
+        ).fetchall():
+            if total <= target_bytes:
+                break
+            conn.execute('DELETE FROM llm_responses WHERE key = ?', (key,))
+            total -= size
+            removed += 1
+    conn.commit()
+    return removed
+
+
+def evict(max_bytes=LLM_CACHE_MAX_BYTES):
+    with _lock:
+        conn = _connect()
+        try:
+            return _evict(conn, max_bytes)
+        finally:
+            conn.close()
+
+
+def stats():
+    """缓存统计: entries / bytes / saved_tokens（命中一次可省下的 token 总数）"""
+    with _lock:
+        conn = _connect()
+        try:
+            entries, size, tokens = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(bytes), 0), COALESCE(SUM(total_tokens), 0) FROM llm_responses'
+            ).fetchone()
+            return {'entries': entries, 'bytes': size, 'saved_tokens': tokens}
+        finally:
+            conn.close()
+
+
+def clear():
+    with _lock:
+        try:
+            os.remove(CACHE_PATH)
+        except FileNotFoundError:
+            pass
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="LLM 响应缓存")
+    parser.add_argument("--evict", action="store_true", help="清理过期条目并按上限淘汰")
+    parser.add_argument("--clear", action="store_true", help="清空缓存")
+    args = parser.parse_args()
+
+    if args.clear:
+        clear()
+        print("🧹 已清空 LLM 缓存")
+    else:
+        if args.evict:
+            print(f"🧹 淘汰了 {evict()} 条")
+        s = stats()
+        print(f"🧠 LLM 缓存: {s['entries']} 条，{s['bytes'] / 1e6:.1f}MB，"
+              f"对应 {s['saved_tokens']} tokens；有效期 {LLM_CACHE_TTL_DAYS} 天，上限 {LLM_CACHE_MAX_BYTES / 1e6:.0f}MB")
@@ -13,18 +13,20 @@ from datetime import datetime, timedelta, timezone
 from dotenv import dotenv_values
 from openai import OpenAI
 
-KNOWLEDGE_LOG_PATH = os.path.expanduser('~/Agents/knowledge_log/concepts.json')
+import article_bodies
+import knowledge_context
+import llm_cache
+from article_bodies import BODY_JOIN, CONTENT_CHARS_SQL
 
 
-def _load_learning_context():
-    """Load compact concept list from knowledge log for injection into synthesis prompt."""
-    try:
-        with open(KNOWLEDGE_LOG_PATH, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        lines = [f"[{c['domain']}] {c['concept']}" for c in data.get('concepts', [])]
-        return '\n'.join(lines)
-    except Exception:
-        return ''
+
+def _learning_section():
+    """Project-relevance block built from the knowledge log; cached until concepts.json changes."""
+    return knowledge_context.fragment('synthesis', lambda concepts: f"""
+**与我们项目的关联**（可选，仅当有实质关联时输出一句，否则省略）：
+对照以下我正在实践的技术领域，点出这篇故事与哪个具体项目经验直接相关，以及它能如何加深我的理解或指导未来决策。
+{knowledge_context.format_concepts(concepts)}
+""")
 
 from app_ai_filtered import _row_to_article, FILTER_THRESHOLD, RECENCY_DAYS, EVERGREEN_SCORE
 
@@ -110,13 +112,14 @@ def _cluster(seed, pool_rows, size=5):
 def _eligible_seed_articles(limit=10):
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
+    article_bodies.register(conn)
     c = conn.cursor()
 
-    c.execute('''
-        SELECT article_title, article_link, published_date, raw_content,
+    c.execute(f'''
+        SELECT id, article_title, article_link, published_date, raw_content,
                criteria_score, criteria_reason, feed_name,
-               COALESCE(content, raw_content, '') as best_content
-        FROM articles
+               {CONTENT_CHARS_SQL} as content_chars
+        FROM articles {BODY_JOIN}
         WHERE criteria_score >= ?
         AND criteria_reason IS NOT NULL
         AND criteria_reason != ''
@@ -136,9 +139,8 @@ def _eligible_seed_articles(limit=10):
             continue
         if _already_done(a['link']):
             continue
-        best = row['best_content'] or ''
         raw = row['raw_content'] or ''
-        is_fulltext = len(best) >= MIN_FULLTEXT and best != raw
+        is_fulltext = row['content_chars'] >= MIN_FULLTEXT
         if not is_fulltext and len(raw) < MIN_SUMMARY:
             continue  # skip short news items
         if a['score'] >= EVERGREEN_SCORE or a['published'] >= cutoff:
@@ -148,12 +150,12 @@ def _eligible_seed_articles(limit=10):
     return seeds
 
 def _pool_rows(days=30):
+    # Metadata + summary only; full bodies are loaded in _synthesize for the chosen cluster
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
     c = conn.cursor()
     c.execute('''
-        SELECT feed_name, article_title, article_link, published_date, raw_content,
-               COALESCE(content, raw_content, '') as best_content
+        SELECT id, feed_name, article_title, article_link, published_date, raw_content
         FROM articles
         WHERE published_date >= datetime('now', ?)
     ''', (f"-{days} days",))
@@ -173,51 +175,50 @@ def _synthesize(cluster):
     has_cn = any(s in CN_SOURCES for s in sources_in_cluster)
     has_en = any(s not in CN_SOURCES for s in sources_in_cluster)
 
+    conn = sqlite3.connect(DB_PATH)
+    bodies = article_bodies.load_content(conn, [r['id'] for r in cluster])
+    conn.close()
     context = "\n\n".join([
-        f"[{r['feed_name']}] {r['article_title']}\n{(r['best_content'] or r['raw_content'] or '')[:1000]}"
+        f"[{r['feed_name']}] {r['article_title']}\n{(bodies.get(r['id']) or r['raw_content'] or '')[:1000]}"
         for r in cluster
     ])
 
     cross_media_section = ""
     if has_cn and has_en:
         cross_media_section = """
-4) 中西方媒体视角差异：
+另外请补充「中西方媒体视角差异」：
    对比中文媒体与英文媒体在报道角度、关注重点、价值判断上的差异。
-   （例如：中文媒体更关注___，而西方媒体更强调___）"""
+   （例如：中文媒体更关注___，而西方媒体更强调___）
+"""
 
     source_list = "、".join(sorted(set(sources_in_cluster)))
-    learning_context = _load_learning_context()
-    learning_section = ""
-    if learning_context:
-        learning_section = f"""
-**与我们项目的关联**（可选，仅当有实质关联时输出一句，否则省略）：
-对照以下我正在实践的技术领域，点出这篇故事与哪个具体项目经验直接相关，以及它能如何加深我的理解或指导未来决策。
-{learning_context}
-"""
 
+    # Stable instructions and the learning block go first so every synthesis shares the same
+    # prompt prefix (provider-side prefix cache); the cluster-specific part comes last.
     prompt = f"""你是一位资深科技分析师，你的读者是数据驱动的业务分析师（BA）——熟悉数据、与产品经理和算法工程师紧密协作，正在向战略视角成长。
 
-以下是来自 {len(cluster)} 个媒体（{source_list}）关于同一话题的报道，请综合输出简洁的「故事全貌」：
+文末是多个媒体关于同一话题的报道，请综合输出简洁的「故事全貌」：
 
 **战略层面**（这件事意味着什么）：
 宏观影响、行业格局变化、商业逻辑与竞争走向。3-5句，聚焦"why it matters"。
 
 **执行层面**（我们应该怎么做）：
 技术/架构选择、数据与指标体系影响、对 BA 与算法/产品团队协作方式的具体影响、值得关注的新工具或方法。3-5句，聚焦"so what for practitioners"。
-{cross_media_section}{learning_section}
+{_learning_section()}
 **延伸思考**（2-3条，面向 BA 成长，不要链接）
 
 ---
-报道内容：
+以下报道来自 {len(cluster)} 个媒体（{source_list}）：
+{cross_media_section}
 {context}""".strip()
 
-    resp = client.chat.completions.create(
+    return llm_cache.complete(
+        client,
         model='deepseek-chat',
         messages=[{'role': 'user', 'content': prompt}],
         temperature=0.4,
         max_tokens=1600
     )
-    return resp.choices[0].message.content
 
 def run(limit=10, pool_days=30):
     _init_db()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+本地预筛 - 用历史 criteria_score 按源训练 TF-IDF + 线性回归，预测分远低于阈值的文章不再送 LLM
+TechCrunch / The Verge 这类宽泛源大量文章最终只有 20-30 分，没必要每篇都付一次 DeepSeek 往返
+
+规则：预测分 < 阈值 - PREFILTER_MARGIN 时直接记为淘汰，理由以 PREFILTER_TAG 开头（便于统计，也不参与再训练）
+只给样本足够、且按时间切分的留出集上“预筛淘汰”精确率 ≥ PREFILTER_MIN_PRECISION 的源启用模型
+特征只用标题 + RSS 摘要（送审前一定有），与是否抓到全文无关
+
+需要 scikit-learn（已列入 requirements.txt；用到时才导入，没装或没训练过模型时预筛自动关闭）
+环境变量 JUDGE_PREFILTER=0 可临时关闭
+
+用法:
+    python prefilter.py              # 查看已保存的模型
+    python prefilter.py --train      # 训练并保存到 data/prefilter.pkl（附离线评估）
+    python prefilter.py --report     # 只做离线评估：各源预筛淘汰的精确率 / 召回率 / 可省调用比例
+"""
+
+import argparse
+import html
+import os
+import pickle
+import re
+import sqlite3
+import threading
+from datetime import datetime
+
+DB_PATH = os.path.join(os.path.dirname(__file__), 'data', 'ai_rss.db')
+MODEL_PATH = os.path.join(os.path.dirname(__file__), 'data', 'prefilter.pkl')
+
+DEFAULT_THRESHOLD = 50          # 与 criteria_judge.DEFAULT_THRESHOLD 一致
+PREFILTER_MARGIN = 20           # 预测分低于 阈值-20 才跳过 LLM，只拦“明显淘汰”的
+PREFILTER_MIN_SAMPLES = 150     # 每个源至少这么多条历史评分才训练
+PREFILTER_HOLDOUT = 0.2         # 最新 20% 留作离线评估
+PREFILTER_MIN_PRECISION = 0.95  # 留出集上预筛淘汰的文章至少 95% 也被 LLM 淘汰才启用
+PREFILTER_MIN_HOLDOUT_SKIPS = 10  # 留出集上预筛淘汰太少时精确率不可信，不启用
+PREFILTER_TEXT_CHARS = 1500
+PREFILTER_TAG = '[本地预筛]'
+ENABLED = os.getenv('JUDGE_PREFILTER', '1').strip().lower() not in ('0', 'false', 'no', 'off')
+
+_TAG_RE = re.compile(r'<[^>]+>')
+
+_lock = threading.Lock()
+_loaded = {'stamp': None, 'data': None}
+
+
+def _text(title, summary):
+    summary = html.unescape(_TAG_RE.sub(' ', summary or ''))
+    return f"{title or ''}\n{summary[:PREFILTER_TEXT_CHARS]}"
+
+
+def _make_model():
+    # 延迟导入：没装 scikit-learn 时只有训练/预筛不可用，不影响其他模块
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import Ridge
+    from sklearn.pipeline import make_pipeline
+    # 字符 n-gram 同时适用于中英文，不需要分词
+    return make_pipeline(
+        TfidfVectorizer(analyzer='char_wb', ngram_range=(2, 4), min_df=2,
+                        max_features=50000, sublinear_tf=True),
+        Ridge(alpha=1.0),
+    )
+
+
+def _training_rows(conn):
+    """
+    按源分组的历史评分 {feed: [(text, score)]}（按入库顺序）
+    排除预筛结果、出错/无 criteria 的默认分，以及从同组副本复用来的分数（只学本源自己的判断）
+    """
+    by_feed = {}
+    for feed, title, summary, score in conn.execute('''
+        SELECT feed_name, article_title, raw_content, criteria_score FROM articles
+        WHERE criteria_score IS NOT NULL
+          AND COALESCE(criteria_reason, '') NOT LIKE ?
+          AND COALESCE(criteria_reason, '') NOT LIKE 'AI审阅出错%'
+          AND COALESCE(criteria_reason, '') NOT LIKE '无明确criteria%'
+          AND COALESCE(criteria_reason, '') NOT LIKE '%（同组复用:%'
+        ORDER BY id
+    ''', (PREFILTER_TAG + '%',)):
+        by_feed.setdefault(feed, []).append((_text(title, summary), score))
+    return by_feed
+
+
+def _evaluate(rows, threshold, margin):
+    """按时间切分：旧的训练、最新 PREFILTER_HOLDOUT 评估；返回预筛淘汰的精确率/召回率等"""
+    split = int(len(rows) * (1 - PREFILTER_HOLDOUT))
+    train, test = rows[:split], rows[split:]
+    model = _make_model()
+    model.fit([t for t, _ in train], [s for _, s in train])
+    predicted = model.predict([t for t, _ in test])
+    cutoff = threshold - margin
+    skipped = [score for p, (_, score) in zip(predicted, test) if p < cutoff]
+    true_skips = sum(score < threshold for score in skipped)
+    rejects = sum(score < threshold for _, score in test)
+    return {
+        'holdout': len(test),
+        'skipped': len(skipped),
+        'precision': true_skips / len(skipped) if skipped else 0.0,
+        'recall': true_skips / rejects if rejects else 0.0,
+        'skip_rate': len(skipped) / len(test) if test else 0.0,
+        'wrongly_skipped': len(skipped) - true_skips,
+    }
+
+
+def evaluate(conn, threshold=DEFAULT_THRESHOLD, margin=PREFILTER_MARGIN):
+    """离线评估各源 {feed: metrics}；样本不足的源不出现在结果里"""
+    results = {}
+    for feed, rows in _training_rows(conn).items():
+        if len(rows) < PREFILTER_MIN_SAMPLES:
+            continue
+        metrics = _evaluate(rows, threshold, margin)
+        metrics['samples'] = len(rows)
+        metrics['enabled'] = (metrics['skipped'] >= PREFILTER_MIN_HOLDOUT_SKIPS
+                              and metrics['precision'] >= PREFILTER_MIN_PRECISION)
+        results[feed] = metrics
+    return results
+
+
+def train(conn, threshold=DEFAULT_THRESHOLD, margin=PREFILTER_MARGIN, path=None):
+    """评估后给达标的源用全部样本重新训练，保存模型与评估结果；返回评估结果"""
+    results = evaluate(conn, threshold, margin)
+    rows_by_feed = _training_rows(conn)
+    feeds = {}
+    for feed, metrics in results.items():
+        entry = dict(metrics)
+        if metrics['enabled']:
+            rows = rows_by_feed[feed]
+            model = _make_model()
+            model.fit([t for t, _ in rows], [s for _, s in rows])
+            entry['model'] = model
+        feeds[feed] = entry
+    data = {'trained_at': datetime.now().isoformat(timespec='seconds'),
+            'threshold': threshold, 'margin': margin, 'feeds': feeds}
+    path = path or MODEL_PATH
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        pickle.dump(data, f)
+    os.replace(tmp, path)
+    return results
+
+
+def load(path=None):
+    """读取保存的模型（按修改时间缓存）；没有模型或没装 scikit-learn 时返回 None"""
+    path = path or MODEL_PATH
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    stamp = (path, st.st_mtime_ns, st.st_size)
+    with _lock:
+        if _loaded['stamp'] != stamp:
+            try:
+                with open(path, 'rb') as f:
+                    _loaded['data'] = pickle.load(f)
+            except ImportError:
+                print("⚠️ 本地预筛需要 scikit-learn（pip install scikit-learn），本次不预筛")
+                _loaded['data'] = None
+            except Exception as e:
+                print(f"⚠️ 本地预筛模型读取失败，本次不预筛: {e}")
+                _loaded['data'] = None
+            _loaded['stamp'] = stamp
+        return _loaded['data']
+
+
+def screen(items, threshold=DEFAULT_THRESHOLD):
+    """
+    items: [(feed_name, title, summary)]
+    返回 {下标: (预测分, 理由)}，只包含可以跳过 LLM 直接淘汰的文章；没有可用模型时为空
+    """
+    data = load() if ENABLED else None
+    if not data:
+        return {}
+    cutoff = threshold - data['margin']
+    by_feed = {}
+    for i, (feed, title, summary) in enumerate(items):
+        if data['feeds'].get(feed, {}).get('model') is not None:
+            by_feed.setdefault(feed, []).append((i, _text(title, summary)))
+    flagged = {}
+    for feed, entries in by_feed.items():
+        predicted = data['feeds'][feed]['model'].predict([t for _, t in entries])
+        for (i, _), p in zip(entries, predicted):
+            if p < cutoff:
+                score = max(0, min(100, int(round(p))))
+                flagged[i] = (score, f"{PREFILTER_TAG} 本地模型预测 {score} 分（低于 {cutoff}），跳过AI审阅")
+    return flagged
+
+
+def print_report(results, threshold=DEFAULT_THRESHOLD, margin=PREFILTER_MARGIN):
+    print(f"\n📊 预筛离线评估（最新 {PREFILTER_HOLDOUT:.0%} 留出，预测 < {threshold - margin} 分即跳过；"
+          f"精确率 = 跳过的文章里 LLM 也 < {threshold} 分的比例）")
+    print(f"  {'源':<30} {'样本':>5} {'留出':>5} {'跳过':>5} {'精确率':>7} {'召回率':>7} {'省调用':>7} {'误杀':>4}  启用")
+    print("  " + "-" * 86)
+    total_holdout = total_skipped = total_wrong = 0
+    for feed, m in sorted(results.items(), key=lambda kv: -kv[1]['skip_rate']):
+        print(f"  {feed[:30]:<30} {m['samples']:>5} {m['holdout']:>5} {m['skipped']:>5} "
+              f"{m['precision']:>7.1%} {m['recall']:>7.1%} {m['skip_rate']:>7.1%} {m['wrongly_skipped']:>4}  "
+              f"{'✅' if m['enabled'] else '—'}")
+        if m['enabled']:
+            total_holdout += m['holdout']
+            total_skipped += m['skipped']
+            total_wrong += m['wrongly_skipped']
+    if total_holdout:
+        print(f"\n  启用的源合计: 留出 {total_holdout} 篇，跳过 {total_skipped} 篇（{total_skipped / total_holdout:.1%}），"
+              f"其中 {total_wrong} 篇 LLM 会保留")
+    else:
+        print("\n  没有达标的源（样本不足或精确率不够）")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="本地预筛（TF-IDF + 线性回归）")
+    parser.add_argument("--train", action="store_true", help="训练并保存模型")
+    parser.add_argument("--report", action="store_true", help="只做离线评估，不保存")
+    parser.add_argument("--margin", type=int, default=PREFILTER_MARGIN, help="预测分低于 阈值-margin 才跳过")
+    args = parser.parse_args()
+
+    if args.train or args.report:
+        try:
+            import sklearn
+        except ImportError:
+            raise SystemExit("❌ 训练/评估需要 scikit-learn：pip install -r requirements.txt（或 pip install scikit-learn）")
+        conn = sqlite3.connect(DB_PATH)
+        if args.train:
+            results = train(conn, margin=args.margin)
+            print(f"💾 已保存到 {MODEL_PATH}")
+        else:
+            results = evaluate(conn, margin=args.margin)
+        conn.close()
+        print_report(results, margin=args.margin)
+    else:
+        data = load()
+        if not data:
+            print("ℹ️ 还没有可用的预筛模型，先运行 python prefilter.py --train")
+        else:
+            enabled = [f for f, m in data['feeds'].items() if m.get('model') is not None]
+            print(f"🧮 预筛模型: 训练于 {data['trained_at']}，{len(enabled)}/{len(data['feeds'])} 个源启用，"
+                  f"预测 < {data['threshold'] - data['margin']} 分跳过 LLM")
+            print_report({f: m for f, m in data['feeds'].items()}, data['threshold'], data['margin'])
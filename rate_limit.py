@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+令牌桶限速 - 线程安全，供全文抓取（按域名）和 LLM 调用（按请求数/token 数）共用
+"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    经典令牌桶：每秒补充 rate 个令牌，最多攒 capacity 个
+    acquire() 阻塞到令牌够用为止
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1):
+        """取走 tokens 个令牌（超过 capacity 的请求按 capacity 计，避免永远等不到）"""
+        tokens = min(float(tokens), self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def consume(self, tokens):
+        """事后扣减（可扣成负数），用于请求完成后才知道实际用量的场景"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= tokens
+
+
+class KeyedRateLimiter:
+    """按 key（如域名）各用一个令牌桶，桶在首次使用时创建"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, key):
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.capacity)
+            return bucket
+
+    def acquire(self, key, tokens=1):
+        self.bucket(key).acquire(tokens)
+
+
+def estimate_tokens(text):
+    """粗估 token 数：中文约 1 字 1 token、英文约 4 字符 1 token，按 UTF-8 字节数 / 3 折中"""
+    return max(1, len((text or '').encode('utf-8')) // 3)
+
+
+class LLMRateLimiter:
+    """
+    LLM 调用限速：每分钟请求数（rpm）和每分钟 token 数（tpm）两个令牌桶，线程间共享
+    调用前按估算 token 数 acquire()，拿到响应后用 settle() 按实际用量多退少补
+    桶容量为 BURST_SECONDS 秒的额度，允许并发线程启动时有小突发
+    """
+
+    BURST_SECONDS = 10
+
+    def __init__(self, rpm, tpm):
+        self.requests = TokenBucket(rpm / 60.0, max(1.0, rpm / 60.0 * self.BURST_SECONDS))
+        self.tokens = TokenBucket(tpm / 60.0, max(1.0, tpm / 60.0 * self.BURST_SECONDS))
+
+    def acquire(self, estimated_tokens):
+        self.requests.acquire(1)
+        self.tokens.acquire(estimated_tokens)
+
+    def settle(self, estimated_tokens, actual_tokens):
+        if actual_tokens is not None:
+            self.tokens.consume(actual_tokens - estimated_tokens)
@@ -6,6 +6,9 @@ from datetime import datetime
 import xml.sax.saxutils as saxutils
 import os
 
+import article_bodies
+from article_bodies import BODY_JOIN, CONTENT_SQL
+
 def escape_xml(text):
     """转义XML特殊字符"""
     if text is None:
@@ -20,22 +23,23 @@ def rebuild_feed():
     # 连接数据库
     conn = sqlite3.connect(db_path)
     conn.row_factory = sqlite3.Row  # 这样可以用列名访问
+    article_bodies.register(conn)
     c = conn.cursor()
     
     print("📊 数据库中有425条记录")
     
     # 查询评分>=30的最新文章（使用正确的字段名）
     try:
-        c.execute('''
+        c.execute(f'''
             SELECT 
                 article_title as title,
                 article_link as link,
                 published_date as published,
                 summary,
-                content,
+                {CONTENT_SQL} as content,
                 feed_name,
                 criteria_score
-            FROM articles 
+            FROM articles {BODY_JOIN}
             WHERE criteria_score >= 30 
             ORDER BY published_date DESC 
             LIMIT 50
@@ -43,16 +47,16 @@ def rebuild_feed():
     except sqlite3.OperationalError as e:
         print(f"第一次查询失败: {e}")
         # 如果criteria_score字段不存在或没有值，查询所有文章
-        c.execute('''
+        c.execute(f'''
             SELECT 
                 article_title as title,
                 article_link as link,
                 published_date as published,
                 summary,
-                content,
+                {CONTENT_SQL} as content,
                 feed_name,
                 criteria_score
-            FROM articles 
+            FROM articles {BODY_JOIN}
             ORDER BY published_date DESC 
             LIMIT 50
         ''')
@@ -15,6 +15,8 @@ import sys
 from datetime import datetime, timezone
 from openai import OpenAI
 
+import llm_cache
+
 DB_PATH = os.path.join(os.path.dirname(__file__), 'data', 'ai_rss.db')
 
 # ── 8大业务域 ──────────────────────────────────────────────────────────────
@@ -204,20 +206,26 @@ def run_convergence(client, segment_label, articles, dry_run=False):
     try:
         articles_json = json.dumps(articles, ensure_ascii=False, indent=2)
         prompt = build_convergence_prompt(segment_label, articles_json)
-        client_obj = client
-        resp = client_obj.chat.completions.create(
+        params = dict(
             model='deepseek-chat',
             messages=[{'role': 'user', 'content': prompt}],
             temperature=0.3,
             max_tokens=4000,
         )
-        raw = resp.choices[0].message.content.strip()
+        content = llm_cache.get(params)
+        cached = content is not None
+        if not cached:
+            resp = client.chat.completions.create(**params)
+            content = resp.choices[0].message.content
+        raw = content.strip()
         if raw.startswith('```'):
             raw = raw.split('```')[1]
             if raw.startswith('json'):
                 raw = raw[4:]
         clusters = json.loads(raw)
-        print(f'    -> {len(clusters)} convergence themes')
+        if not cached:
+            llm_cache.put(params, content)
+        print(f'    -> {len(clusters)} convergence themes{" (cached)" if cached else ""}')
         return clusters
     except Exception as e:
         print(f'    x failed: {e}')
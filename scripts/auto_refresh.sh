@@ -26,11 +26,11 @@ export OPENAI_BASE_URL="https://api.deepseek.com/v1"
 export HTTP_PROXY="http://127.0.0.1:10080"
 export HTTPS_PROXY="http://127.0.0.1:10080"
 
-# 1) Fetch latest articles
-$PY fetcher.py
+# 1) Fetch latest articles (concurrent, per-host limited, only feeds that are due)
+$PY fetcher.py --workers 8 --due
 
-# 2) Fulltext for recent articles (improves scoring)
-$PY fulltext_fetcher.py --days 90 --limit 200
+# 2) Fulltext for recent articles (improves scoring; concurrent, per-domain rate limited)
+$PY fulltext_fetcher.py --days 90 --limit 200 --workers 8
 
 # 3) Score with threshold 50
 $PY criteria_judge.py --threshold 50
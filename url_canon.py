@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+URL 规范化 - 同一篇文章的不同写法（大小写、默认端口、锚点、跟踪参数）归到同一个键
+"""
+
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# 只用于统计来源、不影响页面内容的查询参数
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', 'igshid',
+    'spm', 'ref', 'ref_src', 'share_source', 'scene',
+    'cmpid', 'ncid', 'sr_share', 'fromrss',
+}
+TRACKING_PREFIXES = ('utm_', 'pk_', 'at_')
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def _is_tracking(key):
+    key = key.lower()
+    return key in TRACKING_PARAMS or key.startswith(TRACKING_PREFIXES)
+
+
+def canonical_url(url):
+    """
+    规范化 URL：scheme/主机小写，去默认端口、锚点、跟踪参数，剩余查询参数排序
+    无法解析的输入原样返回（去掉首尾空白）
+    """
+    url = (url or '').strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    if scheme not in ('http', 'https') or not parts.hostname:
+        return url
+    host = parts.hostname.lower().rstrip('.')
+    netloc = host if port in (None, _DEFAULT_PORTS.get(scheme)) else f"{host}:{port}"
+    path = parts.path or '/'
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not _is_tracking(k)
+    ))
+    return urlunsplit((scheme, netloc, path, query, ''))